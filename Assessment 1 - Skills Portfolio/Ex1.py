@@ -1,11 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox 
-import random # for generating random numbers and operations
+import argparse
+import os
+
+from quiz_bank import LEVELS, QuestionBank # Question generation lives in quiz_bank.py
+from quiz_session import QuizSession # Scoring and attempt rules live in quiz_session.py
+from quiz_scores import ScoreBoard # Saved results and the leaderboard
+
+SCORES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quizScores.log")
 
 # This class will hold all logic and UI for math quiz game.
 class MathQuizApp:
-    def __init__(self, master):
+    def __init__(self, master, seed=None, scores_file=SCORES_FILE):
         # 'master' is the main window of Tkinter application.
+        # 'seed' makes the papers repeatable (None picks a random one).
         self.master = master
         self.master.title("Arithmetic Quiz Challenge") # Set the window title
         self.master.geometry("600x450") # Giving window a fixed size
@@ -13,14 +21,16 @@ class MathQuizApp:
 
         # Game State Variables
         # These variables keep track of the current game's progress and settings
-        self.score = 0 # Player's current score
-        self.current_question_num = 0 # Which question number we are on
+        # (score, question number and attempts live on the QuizSession, see quiz_session.py)
         self.total_questions = 10 # Each quiz will have 10 questions
-        self.current_answer = None # The correct answer for the current question
-        self.attempts_left = 2 # How many tries the player has for the current question
         self.difficulty_level = None # Stores the chosen difficulty
         self.min_val = 0 # Minimum value for numbers in questions depending on difficulty
         self.max_val = 0 # Maximum value for numbers in questions 
+        self.seed = seed # Seed for the question banks
+        self.banks = {} # One QuestionBank per difficulty level, made when first chosen
+        self.bank = None # The bank for the chosen difficulty
+        self.session = None # The quiz being played: paper, score and attempts
+        self.scores = ScoreBoard(scores_file) # Every finished quiz, loaded once at startup
 
         # UI Setup
         self.main_frame = tk.Frame(self.master, bg="#f0f0f0") # Light gray background
@@ -77,16 +87,11 @@ class MathQuizApp:
 
         self.difficulty_level = level # Store the chosen level
 
-        # Set min and max values for numbers based on difficulty.
-        if level == "Easy":
-            self.min_val = 1
-            self.max_val = 9 # Single-digit numbers
-        elif level == "Moderate":
-            self.min_val = 10
-            self.max_val = 99 # Double-digit numbers
-        elif level == "Advanced":
-            self.min_val = 1000
-            self.max_val = 9999 # Four-digit numbers
+        # Set min and max values for numbers based on difficulty (see LEVELS in quiz_bank.py).
+        self.min_val, self.max_val = LEVELS[level]
+        if level not in self.banks:
+            self.banks[level] = QuestionBank(level, self.seed, self.total_questions)
+        self.bank = self.banks[level]
         
         # Begin the quiz after selecting difficulty
         self.start_quiz()
@@ -95,10 +100,9 @@ class MathQuizApp:
 
         self._clear_frame(self.main_frame) # Clear the menu screen
 
-        # Reset game state for a new quiz.
-        self.score = 0
-        self.current_question_num = 0
-        self.attempts_left = 2 # Player gets 2 attempts per question
+        # Fresh game state for a new quiz. The whole paper is generated up front,
+        # answers included, with no repeated questions.
+        self.session = QuizSession(self.bank.next_paper(), self.difficulty_level)
 
         # Create a dedicated frame for the quiz questions and input
         self.quiz_frame = tk.Frame(self.main_frame, bg="#e0e0e0", padx=20, pady=20)
@@ -152,7 +156,7 @@ class MathQuizApp:
         # Label to display the current score and question number.
         self.score_display_label = tk.Label(
             self.quiz_frame,
-            text=f"Score: {self.score} | Q: {self.current_question_num}/{self.total_questions}",
+            text=self._score_text(),
             font=('Arial', 14),
             bg="#e0e0e0",
             anchor="e" # Align text to the right
@@ -163,74 +167,63 @@ class MathQuizApp:
         self.generate_question()
 
     def randomInt(self): # Generates a random integer within the range defined by the chosen difficulty
-        return random.randint(self.min_val, self.max_val)
+        return self.bank.random_int()
 
     def decideOperation(self): # Randomly picks either addition or subtraction for the problem
-        return random.choice(['+', '-'])
+        return self.bank.decide_operation()
 
     def generate_question(self): # Creates a new math problem, updates the question label, and prepares for user input. If all questions are done, it calls the results screen.
-        if self.current_question_num >= self.total_questions: # Check if we've gone through all the questions
+        # Move to the next question of the paper (attempts are reset by the session);
+        # the bank already put the larger number first for subtraction and worked out the answer.
+        question = self.session.next_question()
+        if question is None: # Check if we've gone through all the questions
             self.show_results() # If so, show the final results.
             return
-
-        self.current_question_num += 1 # Move to the next question
-        self.attempts_left = 2 # Reset attempts for this new question
-
-        # Get two random numbers based on the difficulty.
-        num1 = self.randomInt()
-        num2 = self.randomInt()
-        operator = self.decideOperation() # Get a random operation
-
-        # For subtraction, ensure the first number is larger or equal to avoid negative results
-        if operator == '-' and num1 < num2:
-            num1, num2 = num2, num1 # Swap them to ensure a positive or zero result
+        num1, operator, num2, _ = question
 
         # Constructing the question string
-        question_text = f"Question {self.current_question_num}/{self.total_questions}: What is {num1} {operator} {num2}?"
+        question_text = f"Question {self.session.current_question_num}/{self.session.total_questions}: What is {num1} {operator} {num2}?"
         self.question_label.config(text=question_text) # Update the question label
 
-        # Calculate the correct answer
-        if operator == '+':
-            self.current_answer = num1 + num2
-        else: 
-            self.current_answer = num1 - num2
-
         # Clear the previous answer from the entry box and any feedback
         self.answer_entry.delete(0, tk.END)
         self.feedback_label.config(text="")
         self.answer_entry.focus_set() # Put the cursor back in the entry box
 
         # Update the score and question count display.
-        self.score_display_label.config(text=f"Score: {self.score} | Q: {self.current_question_num}/{self.total_questions}")
+        self.score_display_label.config(text=self._score_text())
+
+    def _score_text(self): # Score and question count for the bottom of the quiz screen
+        return f"Score: {self.session.score} | Q: {self.session.current_question_num}/{self.session.total_questions}"
 
     def check_answer(self): # Check the user's input against the correct answer, update the score, and provide feedback.
+        if self.session.closed:
+            return # Already answered, the next question is on its way
         try:
             user_answer = int(self.answer_entry.get()) # Try to convert user input to an integer
 
-            if user_answer == self.current_answer:
-                # Correct answer! Award points based on attempt.
-                if self.attempts_left == 2:
-                    self.score += 10 # 10 points for first attempt
+            # The session applies the scoring and attempt rules
+            feedback = self.session.answer(user_answer)
+            if feedback.correct:
+                # Correct answer! Points depend on the attempt.
+                if feedback.points == 10:
                     self.feedback_label.config(text="Correct! (+10 points)", fg="green")
-                elif self.attempts_left == 1:
-                    self.score += 5 # 5 points for second attempt
+                else:
                     self.feedback_label.config(text="Correct! (+5 points on second attempt)", fg="green")
                 
                 # Update the score display immediately
-                self.score_display_label.config(text=f"Score: {self.score} | Q: {self.current_question_num}/{self.total_questions}")
+                self.score_display_label.config(text=self._score_text())
                 # Waiting a bit then move to the next question
                 self.master.after(1500, self.generate_question) # 1.5 second delay
             else:
                 # Incorrect answer.
-                self.attempts_left -= 1 # Decrement attempts
-
-                if self.attempts_left == 1:
+                if not feedback.closed:
                     # Still one attempt left.
                     self.feedback_label.config(text="Incorrect. Try again!", fg="red")
                     self.answer_entry.delete(0, tk.END) # Clear the wrong answer
                     self.answer_entry.focus_set() # Let them try again
-                else: # attempts_left == 0, no more tries for this question
-                    self.feedback_label.config(text=f"Incorrect. The answer was {self.current_answer}.", fg="red")
+                else: # No more tries for this question
+                    self.feedback_label.config(text=f"Incorrect. The answer was {feedback.answer}.", fg="red")
                     # Wait a bit, then move to the next question (no points for this one).
                     self.master.after(2000, self.generate_question) # 2 second delay
         except ValueError:
@@ -242,23 +235,13 @@ class MathQuizApp:
     def show_results(self): # Displays the final score, calculates a rank, and offers to play again
         self._clear_frame(self.main_frame) # Clear the quiz screen
 
-        # Calculate the maximum possible score (10 questions * 10 points each).
-        max_possible_score = self.total_questions * 10
-        # Calculate the percentage score.
-        percentage = (self.score / max_possible_score) * 100 if max_possible_score > 0 else 0
-        
-        # Determine the rank based on the percentage.
-        rank = "F" # Default rank
-        if percentage >= 90:
-            rank = "A+"
-        elif percentage >= 80:
-            rank = "A"
-        elif percentage >= 70:
-            rank = "B"
-        elif percentage >= 60:
-            rank = "C"
-        elif percentage >= 50:
-            rank = "D"
+        # Score out of the maximum possible (10 questions * 10 points each), the
+        # percentage and the rank (A+ for 90% and over, down to F below 50%).
+        score, max_possible_score, percentage, rank = self.session.results()
+
+        # Save the result and find where it places on this level's leaderboard.
+        position, played = self.scores.add(self.difficulty_level, score, max_possible_score)
+        best = self.scores.best_scores()
 
         # Display "Quiz Finished!" title.
         results_label = tk.Label(
@@ -268,17 +251,17 @@ class MathQuizApp:
             bg="#f0f0f0",
             fg="#333333"
         )
-        results_label.pack(pady=30)
+        results_label.pack(pady=20)
 
         # Display the final score and percentage.
         final_score_label = tk.Label(
             self.main_frame,
-            text=f"Your final score: {self.score} out of {max_possible_score} ({percentage:.1f}%)",
+            text=f"Your final score: {score} out of {max_possible_score} ({percentage:.1f}%)",
             font=('Arial', 20),
             bg="#f0f0f0",
             fg="#0066cc" # Blue text
         )
-        final_score_label.pack(pady=15)
+        final_score_label.pack(pady=10)
 
         # Display the calculated rank.
         rank_label = tk.Label(
@@ -289,7 +272,30 @@ class MathQuizApp:
             # Use a different color for top ranks.
             fg="#e91e63" if rank in ["A+", "A"] else "#ff9800" # Pink for A/A+, Orange otherwise
         )
-        rank_label.pack(pady=15)
+        rank_label.pack(pady=10)
+
+        # Display the leaderboard position for this difficulty level.
+        position_label = tk.Label(
+            self.main_frame,
+            text=f"Leaderboard: #{position} of {played} {self.difficulty_level} results",
+            font=('Arial', 14),
+            bg="#f0f0f0",
+            fg="#333333"
+        )
+        position_label.pack(pady=3)
+
+        # Display the best score saved for each difficulty level.
+        best_text = "  |  ".join(
+            f"{level} {found[0]}/{found[1]}" if found else f"{level} -" for level, found in best.items()
+        )
+        best_label = tk.Label(
+            self.main_frame,
+            text=f"Best: {best_text}",
+            font=('Arial', 12),
+            bg="#f0f0f0",
+            fg="#607D8B" # Same gray-blue as the Play Again button
+        )
+        best_label.pack(pady=3)
 
         # Button to play the quiz again (goes back to difficulty selection).
         play_again_button = tk.Button(
@@ -303,7 +309,7 @@ class MathQuizApp:
             pady=10,
             relief="raised"
         )
-        play_again_button.pack(pady=25)
+        play_again_button.pack(pady=15)
 
         # Button to exit the application.
         exit_button = tk.Button(
@@ -317,9 +323,13 @@ class MathQuizApp:
             pady=10,
             relief="raised"
         )
-        exit_button.pack(pady=10)
+        exit_button.pack(pady=5)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arithmetic Quiz Challenge")
+    parser.add_argument("--seed", type=int, default=None, help="repeat the same quizzes")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = MathQuizApp(root)
+    app = MathQuizApp(root, args.seed)
     root.mainloop()
\ No newline at end of file
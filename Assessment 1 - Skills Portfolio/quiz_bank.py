@@ -0,0 +1,139 @@
+# Question bank for the arithmetic quiz, kept separate from the Tkinter code.
+# A paper is a list of (num1, operator, num2, answer) tuples with no repeated
+# question. Every paper is generated from its own seeded random generator, so
+# paper 17 of seed 42 is always the same paper, whichever process makes it.
+# Running this file writes worksheets and answer keys for many papers at once:
+#   python quiz_bank.py Moderate 10000 papers/ [--seed 42] [--questions 10] [--workers 4]
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+# Number range for each difficulty level
+LEVELS = {
+    "Easy": (1, 9),             # Single-digit numbers
+    "Moderate": (10, 99),       # Double-digit numbers
+    "Advanced": (1000, 9999),   # Four-digit numbers
+}
+
+QUESTIONS_PER_PAPER = 10
+PAPERS_PER_FILE = 1000 # Papers written to each worksheet / answer key file
+
+def distinct_questions(low, high):
+    # How many different questions a range allows: every ordered sum, and every
+    # difference with the larger number first (so answers are never negative)
+    span = high - low + 1
+    return span * span + span * (span + 1) // 2
+
+def question_text(question):
+    num1, operator, num2, _ = question
+    return f"{num1} {operator} {num2} ="
+
+class QuestionBank:
+    # Generates papers for one difficulty level. Without a seed a random one is
+    # picked, and kept in self.seed so the same papers can be made again.
+    def __init__(self, level, seed=None, questions=QUESTIONS_PER_PAPER):
+        if level not in LEVELS:
+            raise ValueError(f"Unknown difficulty level '{level}', expected one of {', '.join(LEVELS)}.")
+        self.level = level
+        self.low, self.high = LEVELS[level]
+        if questions > distinct_questions(self.low, self.high):
+            raise ValueError(f"{level} only has {distinct_questions(self.low, self.high)} different questions.")
+        self.questions = questions
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.seed) # For single draws, see random_int
+        self.played = 0 # Papers handed out by next_paper
+
+    def random_int(self): # A single number in this level's range
+        return self.rng.randint(self.low, self.high)
+
+    def decide_operation(self): # A single '+' or '-'
+        return self.rng.choice("+-")
+
+    def paper(self, number=0):
+        # Paper `number` as a list of (num1, operator, num2, answer).
+        # Numbers and operators are drawn in batches rather than one call per
+        # question, with a few spare draws in case some questions repeat.
+        rng = random.Random(f"{self.seed}:{self.level}:{number}")
+        values = range(self.low, self.high + 1)
+        questions = []
+        seen = set()
+        while len(questions) < self.questions:
+            wanted = self.questions - len(questions) + 2
+            nums = rng.choices(values, k=2 * wanted)
+            ops = rng.choices("+-", k=wanted)
+            for i, operator in enumerate(ops):
+                num1, num2 = nums[2 * i], nums[2 * i + 1]
+                if operator == "-" and num1 < num2:
+                    num1, num2 = num2, num1 # Larger number first to avoid negative results
+                key = (num1, operator, num2)
+                if key in seen:
+                    continue
+                seen.add(key)
+                questions.append((num1, operator, num2, num1 + num2 if operator == "+" else num1 - num2))
+                if len(questions) == self.questions:
+                    break
+        return questions
+
+    def next_paper(self):
+        # Paper 0, then 1, 2, ... so playing again gives a fresh paper
+        self.played += 1
+        return self.paper(self.played - 1)
+
+    def papers(self, first=0, count=1):
+        # Papers first .. first + count - 1, generated one after another
+        return [self.paper(n) for n in range(first, first + count)]
+
+def format_worksheet(bank, number, paper):
+    lines = [f"Paper {number + 1} ({bank.level}, seed {bank.seed})"]
+    lines += [f"{i:>3}. {question_text(q)}" for i, q in enumerate(paper, 1)]
+    return "\n".join(lines) + "\n\n"
+
+def format_answers(bank, number, paper):
+    lines = [f"Paper {number + 1} answers"]
+    lines += [f"{i:>3}. {question_text(q)} {q[3]}" for i, q in enumerate(paper, 1)]
+    return "\n".join(lines) + "\n\n"
+
+def write_paper_file(folder, level, seed, questions, first, count):
+    # Worker: writes papers first .. first + count - 1 to one worksheet file
+    # and one answer key file, streaming paper by paper. Returns the paths.
+    bank = QuestionBank(level, seed, questions)
+    name = f"{level.lower()}_{first + 1:07d}-{first + count:07d}.txt"
+    sheet_path = os.path.join(folder, "worksheets_" + name)
+    key_path = os.path.join(folder, "answers_" + name)
+    with open(sheet_path, "w", encoding="utf-8") as sheets, open(key_path, "w", encoding="utf-8") as keys:
+        for number in range(first, first + count):
+            paper = bank.paper(number)
+            sheets.write(format_worksheet(bank, number, paper))
+            keys.write(format_answers(bank, number, paper))
+    return sheet_path, key_path
+
+def write_papers(folder, bank, count, workers=None, per_file=PAPERS_PER_FILE):
+    # Writes `count` papers as worksheet + answer key files, PAPERS_PER_FILE
+    # papers per file, on a process pool (workers=1 runs in this process).
+    # Returns the list of (worksheet, answer key) paths in paper order.
+    os.makedirs(folder, exist_ok=True)
+    jobs = [(folder, bank.level, bank.seed, bank.questions, first, min(per_file, count - first))
+            for first in range(0, count, per_file)]
+    if workers == 1 or len(jobs) < 2:
+        return [write_paper_file(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(write_paper_file, *zip(*jobs)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write quiz worksheets and answer keys.")
+    parser.add_argument("level", choices=list(LEVELS))
+    parser.add_argument("count", type=int, help="number of papers")
+    parser.add_argument("folder", help="where the worksheet and answer files go")
+    parser.add_argument("--seed", type=int, default=None, help="same seed, same papers (default: random)")
+    parser.add_argument("--questions", type=int, default=QUESTIONS_PER_PAPER, help="questions per paper")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    try:
+        bank = QuestionBank(args.level, args.seed, args.questions)
+    except ValueError as e:
+        parser.error(str(e))
+    files = write_papers(args.folder, bank, args.count, args.workers)
+    print(f"Wrote {args.count} {args.level} papers (seed {bank.seed}) to {len(files)} worksheet "
+          f"and {len(files)} answer key files in {args.folder}")
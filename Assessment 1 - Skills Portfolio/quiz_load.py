@@ -0,0 +1,107 @@
+# Load generator for quiz_server.py: simulated players connect at once, each
+# plays a number of quiz sessions back to back, and the run reports sessions per
+# second plus the answer round-trip latency percentiles.
+# Usage: python quiz_load.py [--players 1000] [--sessions 3] [--level Easy]
+#                            [--accuracy 0.8] [--host 127.0.0.1] [--port 8765] [--spawn]
+# --spawn starts its own server on a free port in a separate process.
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from quiz_bank import LEVELS
+
+def percentile(sorted_vals, p):
+    # Nearest-rank percentile of an ascending list
+    k = max(1, -(-len(sorted_vals) * p // 100))
+    return sorted_vals[min(k, len(sorted_vals)) - 1]
+
+def solve(text):
+    # "45 + 9 =" -> 54
+    num1, operator, num2, _ = text.split()
+    return int(num1) + int(num2) if operator == "+" else int(num1) - int(num2)
+
+async def request(reader, writer, msg, latencies):
+    start = time.perf_counter()
+    writer.write(json.dumps(msg).encode() + b"\n")
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    latencies.append(time.perf_counter() - start)
+    if "error" in reply:
+        raise RuntimeError(reply["error"])
+    return reply
+
+async def player(host, port, sessions, level, accuracy, rng, latencies, scores):
+    # One connection playing `sessions` sessions; right with probability `accuracy`
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(sessions):
+            question = await request(reader, writer, {"op": "start", "level": level}, latencies)
+            while True:
+                answer = solve(question["text"])
+                if rng.random() >= accuracy:
+                    answer += 1
+                reply = await request(reader, writer, {"op": "answer", "value": answer}, latencies)
+                if "results" in reply:
+                    scores.append(reply["results"]["score"])
+                    break
+                question = reply.get("next", question)
+    finally:
+        writer.close()
+
+async def run(args, host, port):
+    latencies, scores = [], []
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(player(host, port, args.sessions, args.level, args.accuracy,
+                                            random.Random(rng.random()), latencies, scores)
+                                     for _ in range(args.players)), return_exceptions=True)
+    took = time.perf_counter() - start
+    failed = [r for r in results if isinstance(r, BaseException)]
+    return took, latencies, scores, failed
+
+def spawn_server():
+    # Starts quiz_server.py on a free port and returns (process, port)
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.Popen([sys.executable, os.path.join(here, "quiz_server.py"), "--port", "0"],
+                            stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline() # "Serving quizzes on HOST:PORT"
+    if not line:
+        raise SystemExit("quiz_server.py did not start")
+    return proc, int(line.rsplit(":", 1)[1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate many quiz players against quiz_server.py.")
+    parser.add_argument("--players", type=int, default=1000, help="concurrent connections")
+    parser.add_argument("--sessions", type=int, default=3, help="sessions each player plays")
+    parser.add_argument("--level", choices=list(LEVELS), default="Easy")
+    parser.add_argument("--accuracy", type=float, default=0.8, help="chance each answer is right")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--spawn", action="store_true", help="start a server just for this run")
+    args = parser.parse_args()
+
+    proc, port = spawn_server() if args.spawn else (None, args.port)
+    try:
+        took, latencies, scores, failed = asyncio.run(run(args, args.host, port))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    latencies.sort()
+    print(f"{args.players} players x {args.sessions} {args.level} sessions in {took:.2f} s")
+    print(f"sessions/s {len(scores) / took:,.0f}   requests/s {len(latencies) / took:,.0f}")
+    if latencies:
+        print("latency ms  " + "  ".join(f"p{p} {percentile(latencies, p) * 1e3:.2f}" for p in (50, 95, 99))
+              + f"  max {latencies[-1] * 1e3:.2f}")
+    if scores:
+        print(f"average score {sum(scores) / len(scores):.1f}")
+    if failed:
+        print(f"{len(failed)} players failed, first error: {failed[0]!r}")
+        sys.exit(1)
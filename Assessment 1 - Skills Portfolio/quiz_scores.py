@@ -0,0 +1,152 @@
+# Persistent leaderboard for quiz results.
+# Every finished quiz is appended to a small binary log (quizScores.log), one
+# fixed-size record per result with its difficulty level. In memory each level
+# keeps a count of results per score (in tenths of a percent) and a top-K heap,
+# so a new result's leaderboard position and the best score per level come
+# straight from memory, however many results are stored.
+# Loading replays the log; a snapshot (quizScores.snap) of the counts and
+# heaps lets startup skip the part of the log it already covers.
+import heapq
+import json
+import os
+import struct
+import time
+
+from quiz_bank import LEVELS
+
+# level number, score, max score, unix time
+RECORD = struct.Struct("<BxHHI")
+LEVEL_IDS = {level: i for i, level in enumerate(LEVELS)}
+LEVEL_NAMES = list(LEVELS)
+TOP_K = 10 # Best results kept per level
+SNAPSHOT_EVERY = 50_000 # Write a new snapshot once this many records were replayed
+READ_CHUNK = RECORD.size * 65536
+
+def permille(score, max_score):
+    # Percentage in tenths (0-1000) so results from different paper lengths compare
+    return score * 1000 // max_score if max_score > 0 else 0
+
+class LevelBoard:
+    # Results for one difficulty level: count per permille plus the TOP_K best
+    # as a min-heap of (permille, -record number, score, max score, time), so
+    # on equal scores the earlier result ranks higher
+    def __init__(self):
+        self.counts = {}
+        self.top = []
+        self.total = 0
+
+    def add(self, number, score, max_score, when):
+        key = permille(score, max_score)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        entry = (key, -number, score, max_score, when)
+        if len(self.top) < TOP_K:
+            heapq.heappush(self.top, entry)
+        elif entry > self.top[0]:
+            heapq.heapreplace(self.top, entry)
+        return key
+
+    def position(self, key):
+        # 1 + results with a strictly better score (equal scores share a position)
+        return 1 + sum(n for k, n in self.counts.items() if k > key)
+
+    def best(self):
+        # (score, max score) of the best result, or None if nothing is stored
+        if not self.top:
+            return None
+        best = max(self.top)
+        return best[2], best[3]
+
+    def leaders(self):
+        # The TOP_K best as (score, max score, time), best first
+        return [(score, max_score, when) for _, _, score, max_score, when in sorted(self.top, reverse=True)]
+
+class ScoreBoard:
+    def __init__(self, path):
+        self.path = path
+        self.snapshot_path = os.path.splitext(path)[0] + ".snap"
+        self.boards = {level: LevelBoard() for level in LEVELS}
+        self.records = 0 # Records in the log
+        self.load()
+
+    def load(self):
+        # Snapshot first (if it matches the log), then the rest of the log
+        offset = self.load_snapshot()
+        replayed = self.replay(offset)
+        if replayed >= SNAPSHOT_EVERY:
+            self.save_snapshot()
+
+    def load_snapshot(self):
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snap = json.load(f)
+            offset = snap["records"] * RECORD.size
+            if offset > os.path.getsize(self.path) or snap["top_k"] != TOP_K:
+                return 0 # Log was replaced or truncated since, rebuild from scratch
+            boards = {}
+            for level, data in snap["levels"].items():
+                board = LevelBoard()
+                board.counts = {int(k): n for k, n in data["counts"].items()}
+                board.total = sum(board.counts.values())
+                board.top = [tuple(entry) for entry in data["top"]]
+                heapq.heapify(board.top)
+                boards[level] = board
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+        self.boards.update((level, board) for level, board in boards.items() if level in self.boards)
+        self.records = snap["records"]
+        return offset
+
+    def save_snapshot(self):
+        snap = {"records": self.records, "top_k": TOP_K,
+                "levels": {level: {"counts": board.counts, "top": board.top}
+                           for level, board in self.boards.items()}}
+        tmp = self.snapshot_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snap, f)
+            os.replace(tmp, self.snapshot_path)
+        except OSError:
+            pass # Only a startup shortcut, the log still has everything
+
+    def replay(self, offset):
+        # Adds every complete record from `offset` on; returns how many
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return 0
+        replayed = 0
+        with f:
+            f.seek(offset)
+            number = offset // RECORD.size
+            while chunk := f.read(READ_CHUNK):
+                usable = len(chunk) - len(chunk) % RECORD.size # A torn last record is ignored
+                for level_id, score, max_score, when in RECORD.iter_unpack(chunk[:usable]):
+                    if level_id < len(LEVEL_NAMES):
+                        self.boards[LEVEL_NAMES[level_id]].add(number, score, max_score, when)
+                    number += 1
+                replayed += usable // RECORD.size
+                if usable < len(chunk):
+                    break
+        self.records = number
+        return replayed
+
+    def add(self, level, score, max_score, when=None):
+        # Records a finished quiz and returns its (position, results on that level)
+        when = int(time.time()) if when is None else when
+        record = RECORD.pack(LEVEL_IDS[level], score, max_score, when)
+        try:
+            with open(self.path, "ab") as f:
+                if f.tell() % RECORD.size:
+                    f.truncate(f.tell() - f.tell() % RECORD.size) # Drop a torn record first
+                f.write(record)
+        except OSError:
+            pass # Can't save (read-only folder), still counts for this session
+        board = self.boards[level]
+        key = board.add(self.records, score, max_score, when)
+        self.records += 1
+        return board.position(key), board.total
+
+    def best_scores(self):
+        # {level: (score, max score) or None} for every level
+        return {level: board.best() for level, board in self.boards.items()}
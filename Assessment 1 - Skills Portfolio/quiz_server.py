@@ -0,0 +1,103 @@
+# Hosts quiz sessions over TCP on localhost, one session per connection at a
+# time, all on one asyncio event loop (so thousands of players need no threads).
+# The protocol is one JSON object per line:
+#   -> {"op": "start", "level": "Easy"}
+#   <- {"question": 1, "of": 10, "text": "4 + 5 =", "score": 0}
+#   -> {"op": "answer", "value": 9}
+#   <- {"correct": true, "points": 10, "attempts_left": 2, "closed": true, "answer": 9,
+#       "score": 10, "next": {"question": 2, ...}}      (or "results": {...} after the last one)
+# Bad requests get {"error": "..."} and the connection stays open.
+# Usage: python quiz_server.py [--host 127.0.0.1] [--port 8765] [--seed N]
+import argparse
+import asyncio
+import json
+
+from quiz_bank import LEVELS, QuestionBank, question_text
+from quiz_session import QuizError, QuizSession
+
+class QuizServer:
+    def __init__(self, seed=None, questions=10):
+        # One bank per level; papers are handed out in order, so a seeded
+        # server deals the same sequence of papers every run
+        self.banks = {level: QuestionBank(level, seed, questions) for level in LEVELS}
+        self.connections = 0 # Open connections right now
+        self.started = 0 # Quizzes started since the server came up
+        self.finished = 0 # Quizzes played to the end
+
+    def question_reply(self, session, question):
+        return {"question": session.current_question_num, "of": session.total_questions,
+                "text": question_text(question), "score": session.score}
+
+    def start(self, msg):
+        level = msg.get("level", "Easy")
+        if not isinstance(level, str) or level not in self.banks:
+            raise QuizError(f"Unknown level '{level}', expected one of {', '.join(LEVELS)}.")
+        session = QuizSession(self.banks[level].next_paper(), level)
+        self.started += 1
+        return session, self.question_reply(session, session.next_question())
+
+    def answer(self, session, msg):
+        if session is None:
+            raise QuizError("Start a quiz first.")
+        value = msg.get("value")
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise QuizError("Please send a whole number as the answer.")
+        feedback = session.answer(value)
+        reply = dict(feedback._asdict(), score=session.score)
+        if feedback.closed:
+            # Straight on to the next question (or the results) in the same reply
+            question = session.next_question()
+            if question is None:
+                reply["results"] = session.results()._asdict()
+                self.finished += 1
+            else:
+                reply["next"] = self.question_reply(session, question)
+        return reply
+
+    async def handle(self, reader, writer):
+        # One player: reads requests line by line until they disconnect
+        self.connections += 1
+        session = None
+        try:
+            while line := await reader.readline():
+                try:
+                    msg = json.loads(line)
+                    op = msg.get("op") if isinstance(msg, dict) else None
+                    if op == "start":
+                        session, reply = self.start(msg)
+                    elif op == "answer":
+                        reply = self.answer(session, msg)
+                    else:
+                        raise QuizError("Expected an object with op 'start' or 'answer'.")
+                except (QuizError, ValueError) as e:
+                    reply = {"error": str(e)}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass # Player went away mid-request, or sent a line over the stream limit
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        # Runs until cancelled; `ready` is called with the bound (host, port)
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        async with server:
+            if ready:
+                ready(server.sockets[0].getsockname()[:2])
+            await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve arithmetic quizzes over TCP (JSON lines).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--seed", type=int, default=None, help="deal the same papers every run")
+    args = parser.parse_args()
+
+    quiz = QuizServer(args.seed)
+    # quiz_load.py --spawn reads the port from this line
+    ready = lambda addr: print(f"Serving quizzes on {addr[0]}:{addr[1]}", flush=True)
+    try:
+        asyncio.run(quiz.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        print(f"Stopped after {quiz.started} quizzes ({quiz.finished} finished).")
@@ -0,0 +1,77 @@
+# The quiz rules without any Tkinter, so the same session can be driven by the
+# app, by the network server (quiz_server.py) or by a script.
+# A session walks one paper from quiz_bank: two attempts per question,
+# 10 points for a correct first attempt and 5 for a correct second attempt.
+from collections import namedtuple
+
+ATTEMPTS = 2 # Attempts per question
+POINTS = {2: 10, 1: 5} # Points for a correct answer, by attempts left when answering
+
+# Ranks by minimum percentage, best first
+RANKS = ((90, "A+"), (80, "A"), (70, "B"), (60, "C"), (50, "D"))
+
+# What answer() reports back:
+#  correct        - whether the answer was right
+#  points         - points awarded for it (0 if wrong)
+#  attempts_left  - attempts remaining on this question
+#  closed         - the question is over (right, or no attempts left)
+#  answer         - the correct answer, given once the question is over
+Feedback = namedtuple("Feedback", "correct points attempts_left closed answer")
+
+Results = namedtuple("Results", "score max_score percentage rank")
+
+class QuizError(Exception):
+    pass
+
+def rank_for(percentage):
+    # Letter rank for a percentage score, "F" below 50
+    for minimum, rank in RANKS:
+        if percentage >= minimum:
+            return rank
+    return "F"
+
+class QuizSession:
+    # One player's run through one paper of (num1, operator, num2, answer) questions
+    def __init__(self, paper, level=None):
+        self.paper = paper
+        self.level = level
+        self.total_questions = len(paper)
+        self.score = 0 # Player's current score
+        self.current_question_num = 0 # Which question number we are on (1-based once started)
+        self.attempts_left = ATTEMPTS # Tries left for the current question
+        self.current_answer = None # The correct answer for the current question
+        self.closed = True # No question is waiting for an answer yet
+
+    def finished(self):
+        return self.current_question_num >= self.total_questions and self.closed
+
+    def next_question(self):
+        # Moves on to the next question and returns it, or None when the quiz is over
+        if self.current_question_num >= self.total_questions:
+            return None
+        question = self.paper[self.current_question_num]
+        self.current_question_num += 1
+        self.attempts_left = ATTEMPTS
+        self.current_answer = question[3]
+        self.closed = False
+        return question
+
+    def answer(self, value):
+        # Checks an integer answer against the current question and updates the score
+        if self.closed:
+            raise QuizError("No question is waiting for an answer.")
+        if value == self.current_answer:
+            points = POINTS[self.attempts_left]
+            self.score += points
+            self.closed = True
+            return Feedback(True, points, self.attempts_left, True, self.current_answer)
+        self.attempts_left -= 1
+        self.closed = self.attempts_left == 0
+        return Feedback(False, 0, self.attempts_left, self.closed,
+                        self.current_answer if self.closed else None)
+
+    def results(self):
+        # Final score out of 10 points per question, as a percentage and a rank
+        max_score = self.total_questions * POINTS[ATTEMPTS]
+        percentage = (self.score / max_score) * 100 if max_score > 0 else 0
+        return Results(self.score, max_score, percentage, rank_for(percentage))
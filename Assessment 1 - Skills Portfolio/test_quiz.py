@@ -0,0 +1,124 @@
+# Tests for the quiz rules (quiz_session.py) and the leaderboard (quiz_scores.py).
+# Run from this folder: python -m pytest -q   (or python -m unittest)
+import os
+import random
+import tempfile
+import unittest
+
+import quiz_scores
+from quiz_bank import QuestionBank
+from quiz_scores import RECORD, ScoreBoard, permille
+from quiz_session import QuizError, QuizSession, rank_for
+
+PAPER = [(1, "+", 2, 3), (9, "-", 4, 5), (6, "+", 6, 12)]
+
+class QuizSessionTest(unittest.TestCase):
+    def test_scoring(self):
+        session = QuizSession(PAPER)
+        session.next_question()
+        first = session.answer(3)
+        self.assertEqual((first.correct, first.points, first.closed), (True, 10, True))
+
+        session.next_question()
+        wrong = session.answer(1)
+        self.assertEqual((wrong.correct, wrong.attempts_left, wrong.closed, wrong.answer), (False, 1, False, None))
+        second = session.answer(5)
+        self.assertEqual((second.correct, second.points), (True, 5))
+
+        session.next_question()
+        session.answer(0)
+        last = session.answer(0)
+        self.assertEqual((last.closed, last.answer, last.points), (True, 12, 0))
+        self.assertIsNone(session.next_question())
+        self.assertTrue(session.finished())
+
+        results = session.results()
+        self.assertEqual((results.score, results.max_score), (15, 30))
+        self.assertEqual((results.percentage, results.rank), (50, "D"))
+
+    def test_no_answer_without_question(self):
+        session = QuizSession(PAPER)
+        with self.assertRaises(QuizError):
+            session.answer(3)
+        session.next_question()
+        session.answer(3)
+        with self.assertRaises(QuizError):
+            session.answer(3)
+
+    def test_ranks(self):
+        self.assertEqual([rank_for(p) for p in (100, 90, 89.9, 80, 70, 60, 50, 49.9)],
+                         ["A+", "A+", "A", "A", "B", "C", "D", "F"])
+
+    def test_papers_have_no_repeats(self):
+        bank = QuestionBank("Easy", seed=3, questions=50)
+        for number in range(20):
+            paper = bank.paper(number)
+            self.assertEqual(len({q[:3] for q in paper}), 50)
+            self.assertTrue(all(q[3] >= 0 for q in paper))
+        self.assertEqual(bank.paper(7), QuestionBank("Easy", seed=3, questions=50).paper(7))
+
+class ScoreBoardTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "quizScores.log")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fill(self, board, count, seed=1):
+        rng = random.Random(seed)
+        for n in range(count):
+            board.add(rng.choice(["Easy", "Moderate", "Advanced"]), rng.randrange(0, 101, 5), 100, when=n)
+
+    def state(self, board):
+        return board.records, {level: (b.counts, sorted(b.top), b.total) for level, b in board.boards.items()}
+
+    def test_positions(self):
+        board = ScoreBoard(self.path)
+        self.assertEqual(board.add("Easy", 50, 100), (1, 1))
+        self.assertEqual(board.add("Easy", 80, 100), (1, 2))
+        self.assertEqual(board.add("Easy", 50, 100), (2, 3))   # Shares second place
+        self.assertEqual(board.add("Moderate", 10, 100), (1, 1))
+        self.assertEqual(board.best_scores()["Easy"], (80, 100))
+        self.assertIsNone(board.best_scores()["Advanced"])
+        self.assertEqual(permille(7, 8), 875)
+
+    def test_replay_matches_live_board(self):
+        board = ScoreBoard(self.path)
+        self.fill(board, 500)
+        self.assertEqual(self.state(ScoreBoard(self.path)), self.state(board))
+
+    def test_torn_record_is_dropped(self):
+        board = ScoreBoard(self.path)
+        self.fill(board, 20)
+        with open(self.path, "ab") as f:
+            f.write(RECORD.pack(0, 100, 100, 0)[:5])  # Crash halfway through a write
+        reopened = ScoreBoard(self.path)
+        self.assertEqual(self.state(reopened), self.state(board))
+
+        # The next result replaces the torn bytes instead of following them
+        reopened.add("Easy", 100, 100, when=99)
+        self.assertEqual(os.path.getsize(self.path), 21 * RECORD.size)
+        self.assertEqual(self.state(ScoreBoard(self.path)), self.state(reopened))
+
+    def test_snapshot_covers_replay(self):
+        old = quiz_scores.SNAPSHOT_EVERY
+        quiz_scores.SNAPSHOT_EVERY = 100
+        try:
+            board = ScoreBoard(self.path)
+            self.fill(board, 150)
+            ScoreBoard(self.path)           # Replays 150 records, writes a snapshot
+            self.assertTrue(os.path.exists(board.snapshot_path))
+            self.fill(board, 30, seed=2)     # More results after the snapshot
+            self.assertEqual(self.state(ScoreBoard(self.path)), self.state(board))
+
+            # A log that was replaced (shorter than the snapshot) is replayed from scratch
+            os.remove(self.path)
+            fresh = ScoreBoard(self.path)
+            fresh.add("Easy", 10, 100, when=0)
+            self.assertEqual(self.state(ScoreBoard(self.path)), self.state(fresh))
+        finally:
+            quiz_scores.SNAPSHOT_EVERY = old
+
+if __name__ == "__main__":
+    unittest.main()
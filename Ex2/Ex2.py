@@ -1,21 +1,28 @@
 import tkinter as tk                    
 from tkinter import messagebox          
-import random                           
 import os                              
+import sys
 
-# this function just grabs all the jokes from the txt file
-def load_jokes():
-    jokes = []                          # empty list where i put every joke
+from joke_corpus import JokeCorpus
+from joke_scheduler import JokeScheduler, ratings_path
+
+# this function finds the jokes and opens them as a JokeCorpus
+# (it used to read every joke into a list, now it only reads the index so
+# startup is instant even with millions of jokes, see joke_corpus.py)
+def load_jokes(path=None):
+    jokes = []                          # empty list if anything goes wrong
     
-    # sometimes python looks in the wrong folder so i check two places just in case
-    paths = [
-        "randomJokes.txt",                                      # normal way
-        os.path.join(os.path.dirname(__file__), "randomJokes.txt")  # the safe way
+    # sometimes python looks in the wrong folder so i check two places just in case.
+    # a "jokes" folder full of .txt files wins over the single randomJokes.txt
+    here = os.path.dirname(__file__)
+    paths = [path] if path else [
+        "jokes", "randomJokes.txt",                             # normal way
+        os.path.join(here, "jokes"), os.path.join(here, "randomJokes.txt")  # the safe way
     ]
     
     file_location = None                # gonna remember where the file actually is
-    for p in paths:                     # check both spots
-        if os.path.exists(p):           # if the file is there
+    for p in paths:                     # check every spot
+        if os.path.exists(p):           # if the file (or folder) is there
             file_location = p           # cool we found it
             break                       # stop looking
     
@@ -25,32 +32,19 @@ def load_jokes():
             "bro where is randomJokes.txt??\nput it in the same folder as this file pls")
         return jokes                    # give back nothing so program knows it failed
     
-    # now actually try to read the file
+    # now open it (first time this reads every file on a few processes, drops
+    # repeated jokes and saves randomJokes.txt.idx / jokes.idx next to it)
     try:
-        with open(file_location, "r", encoding="utf-8") as f:   # open the file
-            for line in f:              # go through every line
-                line = line.strip()     # remove extra spaces and newlines
-                if not line or "?" not in line:   # skip empty lines or lines with no ?
-                    continue            # next line please
-                
-                # split the joke into question and answer
-                if "? " in line:        # some jokes have space after the ?
-                    q, a = line.split("? ", 1)   # split it properly
-                else:                   # some dont have space
-                    q, a = line.split("?", 1)
-                    
-                q = q.strip() + "?"     # make sure the question ends with ?
-                a = a.strip()           # clean up the answer
-                jokes.append((q, a))    # add this joke to my list
-    except:                         # if anything goes wrong
+        jokes = JokeCorpus(file_location)
+    except (OSError, ValueError):   # if anything goes wrong
         messagebox.showerror("Error", "couldnt open the jokes file man :(")
-        return jokes                # return empty so program stops
+        return []                   # return empty so program stops
         
-    return jokes                    # finally give back all the jokes
+    return jokes                    # works like a list of (question, answer)
 
 # main app thingy
 class JokeApp:
-    def __init__(self, root):
+    def __init__(self, root, path=None):
         self.root = root            # save the window
         self.root.title("Alexa, tell me a Joke!")   # title at the top
         self.root.geometry("660x520")   # made it big enough so nothing gets cut
@@ -58,10 +52,19 @@ class JokeApp:
         self.root.resizable(False, False)   # dont let people stretch it
         
         # load all jokes when it starts
-        self.jokes = load_jokes()   # get the jokes
+        self.jokes = load_jokes(path)   # get the jokes (path = file or folder, optional)
         if not self.jokes:          # if no jokes loaded
             self.root.destroy()     # just close everything
             return                  # stop here
+        
+        # decides the order, no repeats until every joke was shown (remembers
+        # where it got to in randomJokes.txt.state, ratings from randomJokes.ratings)
+        self.scheduler = JokeScheduler(len(self.jokes), self.jokes.path + ".state",
+                                       ratings_path(self.jokes.path))
+        if not self.scheduler.eligible():   # every joke rated 0 lol
+            messagebox.showerror("No Jokes", "all the jokes are rated 0, nothing to show")
+            self.root.destroy()
+            return
             
         self.setup = ""             # current joke question
         self.punchline = ""         # current joke answer
@@ -115,7 +118,8 @@ class JokeApp:
         
     # when you want a new joke
     def get_new_joke(self):
-        self.setup, self.punchline = random.choice(self.jokes)  # pick random one
+        # next one from the shuffle, only that one line gets read from the file
+        self.setup, self.punchline = self.jokes[self.scheduler.next()]
         self.setup_label.config(text=self.setup)    # show question
         self.punch_label.config(text="")            # hide old answer
         self.main_btn.config(state="disabled")      # cant spam the button
@@ -128,5 +132,6 @@ class JokeApp:
 
 if __name__ == "__main__":
     root = tk.Tk()             
-    app = JokeApp(root)        
+    # python Ex2.py [jokes file or folder]
+    app = JokeApp(root, sys.argv[1] if len(sys.argv) > 1 else None)
     root.mainloop()             
\ No newline at end of file
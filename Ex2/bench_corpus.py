@@ -0,0 +1,65 @@
+# merged corpus benchmark: parse + dedupe + index time and memory for a folder
+# of joke files with 1-8 worker processes
+# usage: python bench_corpus.py [files] [lines_per_file] [duplicate_fraction]
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from joke_corpus import JokeCorpus, MergeReport, find_joke_files, index_path, merge_jokes
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from cohort import write_joke_files
+
+WORKERS = (1, 2, 4, 8)
+
+if __name__ == "__main__":
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 125_000
+    dupes = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "jokes")
+        os.mkdir(folder)
+        unique = write_joke_files(folder, files, lines, dupes)
+        paths = find_joke_files(folder)
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"{files} files x {lines} lines ({size / 2**20:.0f} MB, {unique} unique), "
+              f"{os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'seconds':>8} {'lines/s':>11} {'MB/s':>7}")
+
+        for workers in WORKERS:
+            report = MergeReport()
+            start = time.perf_counter()
+            offsets, file_ids = merge_jokes(paths, workers, report)
+            took = time.perf_counter() - start
+            assert report.kept == unique == len(offsets), report.summary()
+            print(f"{workers:>8} {took:>8.2f} {report.jokes / took:>11,.0f} {size / 2**20 / took:>7.1f}")
+            del offsets, file_ids
+
+        # memory of the merging process (parsing happens in the workers)
+        tracemalloc.start()
+        merge_jokes(paths, WORKERS[-1])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"merge peak {peak / 2**20:.1f} MB python heap ({peak / unique:.0f} bytes per unique joke)")
+
+        # what the app pays on every start once the index exists
+        if os.path.exists(index_path(folder)):
+            os.remove(index_path(folder))
+        JokeCorpus(folder)
+        start = time.perf_counter()
+        corpus = JokeCorpus(folder)
+        took = time.perf_counter() - start
+        picks = [random.randrange(len(corpus)) for _ in range(10_000)]
+        start = time.perf_counter()
+        for i in picks:
+            corpus[i]
+        pick = (time.perf_counter() - start) / len(picks)
+        child = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        print(f"{report.summary()}")
+        print(f"warm open {took * 1e3:.1f} ms, random joke {pick * 1e6:.1f} us, "
+              f"largest worker {child:.0f} MB RSS")
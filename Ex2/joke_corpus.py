@@ -0,0 +1,210 @@
+# the joke file but lazy: instead of reading every joke into a list at startup
+# we keep a little index of where each joke starts, and only read the one joke
+# we actually want to show. works the same for 30 jokes or 30 million.
+#
+# the corpus can be one file (randomJokes.txt) or a folder full of *.txt joke
+# files. every file is parsed on a process pool, jokes with the same setup are
+# only kept once (first file wins, files go in name order) and everything ends
+# up in one merged index saved next to the file / folder as <name>.idx
+import glob
+import hashlib
+import json
+import mmap
+import os
+import string
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# index file = header, a json table of the source files, then one 8 byte offset
+# and one 4 byte file number per joke.
+# header: magic, byte order, number of jokes, length of the json table
+MAGIC = b"JKIDX2"
+HEADER = struct.Struct("<6s1s1xqq")
+ORDER = b"<" if sys.byteorder == "little" else b">"
+PUNCTUATION = bytes.maketrans(string.punctuation.encode(), b" " * len(string.punctuation))
+
+def split_joke(line):
+    # "setup?punchline" -> ("setup?", "punchline"), or None if its not a joke
+    line = line.strip()
+    if not line or "?" not in line:     # empty line or no ? means no joke here
+        return None
+    q, a = line.split("?", 1)           # everything after the first ? is the answer
+    return q.strip() + "?", a.strip()
+
+def setup_hash(setup):
+    # 64 bit fingerprint of a setup (raw utf-8 bytes) ignoring case, spacing and
+    # punctuation, so "Why did the chicken cross the road?" and
+    # "why did the chicken, cross the road ?" count as the same joke.
+    # works on bytes so its quick, which means only a-z get case folded.
+    # only the number is kept, never the text
+    key = b" ".join(setup.lower().translate(PUNCTUATION).split())
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+def index_path(path):
+    return path + ".idx"                # cached right next to the jokes file / folder
+
+def find_joke_files(path):
+    # a folder means every *.txt in it (sorted so the order is always the same)
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.txt")))
+    return [path]
+
+def source_table(path, files):
+    # names (relative to the folder) + size + mtime, to tell if the index is out of date
+    base = path if os.path.isdir(path) else os.path.dirname(path)
+    table = []
+    for f in files:
+        st = os.stat(f)
+        table.append([os.path.relpath(f, base or "."), st.st_size, st.st_mtime_ns])
+    return table
+
+def parse_joke_file(path):
+    # worker: where every joke in one file starts + the hash of its setup.
+    # runs in a child process, sends back two compact arrays instead of text
+    offsets, hashes = array("Q"), array("Q")
+    pos = 0
+    with open(path, "rb") as f:
+        for raw in f:                   # reading in binary so pos is in bytes
+            q = raw.find(b"?")          # same rule as split_joke: any line with a ? is a joke
+            if q != -1:
+                offsets.append(pos)
+                hashes.append(setup_hash(raw[:q]))
+            pos += len(raw)
+    return path, offsets, hashes
+
+class MergeReport:
+    # what happened while building the merged index
+    def __init__(self):
+        self.files = 0
+        self.jokes = 0          # jokes found in all files
+        self.duplicates = 0     # of those, skipped because the setup was seen already
+
+    @property
+    def kept(self):
+        return self.jokes - self.duplicates
+
+    def summary(self):
+        return (f"{self.kept} jokes from {self.files} files "
+                f"({self.duplicates} duplicate setups skipped)")
+
+def merge_jokes(files, workers=None, report=None):
+    # parses every file (on a process pool unless workers=1 or theres only one)
+    # and merges them in file order, dropping repeated setups.
+    # memory is the merged index plus one hash per unique joke, not the jokes
+    if report is None:
+        report = MergeReport()
+    offsets, file_ids = array("Q"), array("I")
+    seen = set()
+
+    def merge_all(results):
+        for file_id, (path, offs, hashes) in enumerate(results):
+            report.files += 1
+            report.jokes += len(offs)
+            for off, h in zip(offs, hashes):
+                if h in seen:
+                    report.duplicates += 1
+                else:
+                    seen.add(h)
+                    offsets.append(off)
+                    file_ids.append(file_id)
+
+    if workers == 1 or len(files) < 2:
+        merge_all(map(parse_joke_file, files))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            merge_all(pool.map(parse_joke_file, files))
+    return offsets, file_ids
+
+def write_index(path, table, offsets, file_ids):
+    # written to a temp file first so a half written index is never used
+    tmp = index_path(path) + ".tmp"
+    meta = json.dumps(table).encode("utf-8")
+    meta += b" " * (-len(meta) % 8)     # keeps the offsets 8 byte aligned
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, ORDER, len(offsets), len(meta)))
+        f.write(meta)
+        offsets.tofile(f)
+        file_ids.tofile(f)
+    os.replace(tmp, index_path(path))
+
+def read_index(path, table):
+    # (offsets, file_ids) mapped straight from disk, or None if missing / out of date
+    try:
+        with open(index_path(path), "rb") as f:
+            head = f.read(HEADER.size)
+            if len(head) < HEADER.size:
+                return None
+            magic, order, count, meta_len = HEADER.unpack(head)
+            if (magic, order) != (MAGIC, ORDER):
+                return None             # old index or another machine's, rebuild
+            if json.loads(f.read(meta_len)) != table:
+                return None             # some jokes file changed since, so rebuild
+            start = HEADER.size + meta_len
+            if os.fstat(f.fileno()).st_size != start + count * 12:
+                return None             # truncated somehow
+            if count == 0:
+                return array("Q"), array("I")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    view = memoryview(mm)
+    return view[start:start + count * 8].cast("Q"), view[start + count * 8:].cast("I")
+
+def open_index(path, files, workers=None):
+    # offsets + file numbers for every joke, building (and caching) them if needed
+    table = source_table(path, files)
+    found = read_index(path, table)
+    if found is not None:
+        return found
+    offsets, file_ids = merge_jokes(files, workers)
+    try:
+        write_index(path, table, offsets, file_ids)
+    except OSError:
+        pass                            # read only folder, just use it from memory this time
+    return offsets, file_ids
+
+class JokeCorpus:
+    # looks like a list of (setup, punchline) tuples but nothing is loaded up front.
+    # corpus[i] jumps to the i-th joke through the index and parses only that line.
+    # `path` is a jokes file or a folder of them
+    def __init__(self, path, workers=None):
+        self.path = path.rstrip("/\\") or path
+        self.files = find_joke_files(self.path)
+        self.offsets, self.file_ids = open_index(self.path, self.files, workers)
+        self.data = [None] * len(self.files)   # files get mapped the first time theyre needed
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def source(self, file_id):
+        data = self.data[file_id]
+        if data is None:
+            with open(self.files[file_id], "rb") as f:
+                # mmap cant map an empty file, and theres nothing to read in one anyway
+                empty = os.fstat(f.fileno()).st_size == 0
+                data = self.data[file_id] = b"" if empty else mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return data
+
+    def line(self, i):
+        data = self.source(self.file_ids[i])
+        start = self.offsets[i]
+        end = data.find(b"\n", start)
+        return data[start:end if end != -1 else len(data)].decode("utf-8", "replace")
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("joke index out of range")
+        return split_joke(self.line(i))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def close(self):
+        for data in self.data:
+            if isinstance(data, mmap.mmap):
+                data.close()
+        self.data = [None] * len(self.files)
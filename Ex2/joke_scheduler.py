@@ -0,0 +1,174 @@
+# picks which joke comes next so you dont get the same one twice in a row.
+# it walks through a shuffled order of the whole corpus and only starts a new
+# shuffle when every joke has been shown. the shuffle is never stored, it is
+# worked out one step at a time (a feistel permutation), so it costs the same
+# tiny bit of memory for 30 jokes or 30 million. where we are in the shuffle is
+# saved next to the jokes file, so closing the app doesnt reset it.
+#
+# ratings (optional) live in randomJokes.ratings, one "joke_number weight" per
+# line (joke numbers start at 0, # starts a comment). unrated jokes have weight
+# 1, weight 2 comes up about twice as early, weight 0 never comes up. rated
+# jokes still only show once per round.
+import json
+import math
+import os
+import random
+
+MASK64 = (1 << 64) - 1
+ROUNDS = 4
+
+def mix(x):
+    # scrambles a 64 bit number (splitmix64 finaliser), used as the "random" part
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+def unit(x):
+    # mix(x) as a float in (0, 1)
+    return ((mix(x) >> 11) + 0.5) / (1 << 53)
+
+class FeistelPermutation:
+    # a shuffle of 0..n-1 you can ask for one position at a time.
+    # a feistel network scrambles numbers up to the next even power of two,
+    # which is always a 1 to 1 mapping; results past n just get scrambled again
+    # (cycle walking) until they land inside, which keeps it 1 to 1 on 0..n-1
+    def __init__(self, n, key):
+        self.n = n
+        bits = max(2, (n - 1).bit_length())
+        self.half = (bits + 1) // 2
+        self.mask = (1 << self.half) - 1
+        self.keys = [mix(key * ROUNDS + r) for r in range(ROUNDS)]
+
+    def scramble(self, x):
+        left, right = x >> self.half, x & self.mask
+        for k in self.keys:
+            left, right = right, left ^ (mix(k ^ right) & self.mask)
+        return (left << self.half) | right
+
+    def __getitem__(self, i):
+        x = self.scramble(i)
+        while x >= self.n:
+            x = self.scramble(x)
+        return x
+
+def ratings_path(path):
+    return os.path.splitext(path)[0] + ".ratings"
+
+def read_ratings(path, size):
+    # {joke number: weight} from the ratings file, {} if there isnt one
+    ratings = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.split("#", 1)[0].split()
+                if not parts:
+                    continue
+                try:
+                    number, weight = int(parts[0]), float(parts[1])
+                except (IndexError, ValueError):
+                    continue            # not "number weight", just ignore it
+                if 0 <= number < size and weight >= 0 and math.isfinite(weight):
+                    ratings[number] = weight
+    except OSError:
+        pass
+    return ratings
+
+def file_sig(path):
+    # (size, mtime) so we notice when the ratings file gets edited
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+    except OSError:
+        return None
+
+class JokeScheduler:
+    # next() gives the number of the next joke to show.
+    # each round is a weighted draw without putting jokes back:
+    #  - unrated jokes (weight 1) come from the feistel shuffle, skipping rated ones
+    #  - rated jokes are put in order once per round with the Efraimidis-Spirakis
+    #    trick (sort by random ** (1 / weight)), which only needs memory per rated joke
+    #  - each draw picks between the two piles in proportion to their weight left
+    def __init__(self, size, state_file=None, ratings_file=None):
+        self.size = size
+        self.state_file = state_file
+        self.ratings_file = ratings_file
+        self.ratings = read_ratings(ratings_file, size) if ratings_file else {}
+        self.state = self.load_state()
+        self.start_round()
+
+    def fresh_state(self, seed=None):
+        return {"size": self.size, "seed": random.getrandbits(63) if seed is None else seed,
+                "round": 0, "draws": 0, "unrated_pos": 0, "unrated_done": 0, "rated_done": 0,
+                "ratings": file_sig(self.ratings_file) if self.ratings_file else None}
+
+    def load_state(self):
+        # carries on from the saved position unless the corpus or ratings changed
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                state = json.load(f)
+            sig = file_sig(self.ratings_file) if self.ratings_file else None
+            if state.get("size") == self.size and state.get("ratings") == sig:
+                fresh = self.fresh_state(state["seed"])
+                if state.keys() == fresh.keys():
+                    return state
+            return self.fresh_state(state.get("seed"))
+        except (OSError, TypeError, ValueError, KeyError):
+            return self.fresh_state()
+
+    def save_state(self):
+        if not self.state_file:
+            return
+        tmp = self.state_file + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.state, f)
+            os.replace(tmp, self.state_file)
+        except OSError:
+            pass                        # cant save (read only folder), it still works this session
+
+    def start_round(self):
+        # sets up the shuffle + rated order for the current round
+        key = mix(self.state["seed"] ^ mix(self.state["round"]))
+        self.perm = FeistelPermutation(self.size, key) if self.size else None
+        rated = [(unit(key ^ mix(n)) ** (1 / w), n) for n, w in self.ratings.items() if w > 0]
+        rated.sort(reverse=True)
+        self.rated_order = [n for _, n in rated]
+        # rated_left[i] = weight of rated jokes from position i on
+        self.rated_left = [0.0] * (len(rated) + 1)
+        for i in range(len(rated) - 1, -1, -1):
+            self.rated_left[i] = self.rated_left[i + 1] + self.ratings[self.rated_order[i]]
+        self.unrated_total = self.size - len(self.ratings)
+
+    def eligible(self):
+        # how many jokes can come up at all (weight above 0)
+        return self.unrated_total + len(self.rated_order)
+
+    def remaining(self):
+        return self.eligible() - self.state["unrated_done"] - self.state["rated_done"]
+
+    def next(self):
+        # number of the next joke, or None if nothing can be shown
+        if not self.eligible():
+            return None
+        if not self.remaining():        # everything shown, new round
+            self.state.update(round=self.state["round"] + 1, draws=0, unrated_pos=0,
+                              unrated_done=0, rated_done=0)
+            self.start_round()
+        s = self.state
+        unrated_weight = self.unrated_total - s["unrated_done"]
+        rated_weight = self.rated_left[s["rated_done"]]
+        roll = unit(self.perm.keys[0] ^ mix(s["draws"] + 1)) * (unrated_weight + rated_weight)
+        if roll < rated_weight or not unrated_weight:
+            number = self.rated_order[s["rated_done"]]
+            s["rated_done"] += 1
+        else:
+            while True:                 # walk the shuffle, skipping jokes that have a rating
+                number = self.perm[s["unrated_pos"]]
+                s["unrated_pos"] += 1
+                if number not in self.ratings:
+                    break
+            s["unrated_done"] += 1
+        s["draws"] += 1
+        self.save_state()
+        return number
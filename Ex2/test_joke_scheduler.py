@@ -0,0 +1,73 @@
+# tests for the feistel shuffle and the no-repeat joke scheduler
+# run from this folder: python -m pytest -q   (or python -m unittest)
+import os
+import tempfile
+import unittest
+
+from joke_scheduler import FeistelPermutation, JokeScheduler
+
+class FeistelTest(unittest.TestCase):
+    def test_is_a_permutation(self):
+        for n in (1, 2, 3, 7, 16, 17, 100, 1000, 4097):
+            for key in (0, 1, 12345):
+                perm = FeistelPermutation(n, key)
+                self.assertEqual(sorted(perm[i] for i in range(n)), list(range(n)), (n, key))
+
+    def test_key_changes_the_order(self):
+        a = [FeistelPermutation(1000, 1)[i] for i in range(1000)]
+        b = [FeistelPermutation(1000, 2)[i] for i in range(1000)]
+        self.assertNotEqual(a, b)
+        self.assertEqual(a, [FeistelPermutation(1000, 1)[i] for i in range(1000)])
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = os.path.join(self.tmp.name, "jokes.state")
+        self.ratings = os.path.join(self.tmp.name, "jokes.ratings")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def draw(self, scheduler, count):
+        return [scheduler.next() for _ in range(count)]
+
+    def test_every_joke_once_per_round(self):
+        scheduler = JokeScheduler(50, self.state)
+        first, second = self.draw(scheduler, 50), self.draw(scheduler, 50)
+        self.assertEqual(sorted(first), list(range(50)))
+        self.assertEqual(sorted(second), list(range(50)))
+        self.assertNotEqual(first, second)  # a new shuffle each round
+
+    def test_restart_carries_on_without_repeats(self):
+        shown = self.draw(JokeScheduler(40, self.state), 15)
+        shown += self.draw(JokeScheduler(40, self.state), 25)  # like reopening the app
+        self.assertEqual(sorted(shown), list(range(40)))
+
+    def test_corpus_change_starts_over(self):
+        self.draw(JokeScheduler(40, self.state), 15)
+        self.assertEqual(sorted(self.draw(JokeScheduler(41, self.state), 41)), list(range(41)))
+
+    def test_ratings(self):
+        with open(self.ratings, "w", encoding="utf-8") as f:
+            f.write("# number weight\n3 0\n5 4\n7 2.5\nnot a rating\n99 1\n")
+        scheduler = JokeScheduler(20, self.state, self.ratings)
+        shown = self.draw(scheduler, 19)
+        self.assertEqual(sorted(shown), [n for n in range(20) if n != 3])
+        self.assertEqual(scheduler.remaining(), 0)
+
+        # heavily rated jokes come up earlier on average
+        early = 0
+        for seed in range(200):
+            scheduler.state = scheduler.fresh_state(seed)
+            scheduler.start_round()
+            early += 5 in self.draw(scheduler, 5)
+        self.assertGreater(early, 100)
+
+    def test_nothing_to_show(self):
+        self.assertIsNone(JokeScheduler(0).next())
+        with open(self.ratings, "w", encoding="utf-8") as f:
+            f.write("0 0\n1 0\n")
+        self.assertIsNone(JokeScheduler(2, None, self.ratings).next())
+
+if __name__ == "__main__":
+    unittest.main()
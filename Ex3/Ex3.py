@@ -1,6 +1,14 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import os
+from tkinter import ttk, messagebox, simpledialog, filedialog
+import argparse
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import student_perf as perf
+
+from student_core import (DuplicateCodeError, EditHistory, InvalidRecordError, LoadReport, calculate_grade,
+                          locate_marks_file, open_database)
+from student_csv import iter_csv_batches, parse_mapping, write_rows
 
 # Choosing the App Theme
 BG_MAIN = "#1e1e2e"
@@ -10,110 +18,233 @@ ACCENT = "#bd93f9"
 BTN_BG = "#44475a"
 BTN_HOVER = "#6272a4"
 
-class StudentManager:
+# Table geometry used by the virtual (windowed) Treeview
+ROW_HEIGHT = 40
+HEADING_HEIGHT = 32
+
+# Waiting this long after the last keystroke before filtering the table
+SEARCH_DELAY_MS = 150
+
+# Background I/O: how often Tk checks for finished work, and how long edits
+# are gathered before being written together
+IO_POLL_MS = 50
+SAVE_COALESCE_MS = 200
+
+class IOWorker:
+    # One background thread for file work. Finished jobs are handed back to the
+    # Tk thread through a queue that is polled with window.after, so callbacks
+    # (and any messagebox they show) always run on the UI thread.
     def __init__(self, window):
+        self.win = window
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.finished = queue.Queue()
+        self.running = 0
+        self.win.after(IO_POLL_MS, self.poll)
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        self.running += 1
+        job = self.pool.submit(fn, *args)
+        job.add_done_callback(lambda j: self.finished.put((j, on_done, on_error)))
+
+    def poll(self):
+        while True:
+            try:
+                job, on_done, on_error = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            self.running -= 1
+            err = job.exception()
+            if err is None:
+                if on_done: on_done(job.result())
+            elif on_error:
+                on_error(err)
+        self.win.after(IO_POLL_MS, self.poll)
+
+    def busy(self):
+        return self.running > 0
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+class StudentManager:
+    def __init__(self, window, db_file=None):
         self.win = window
         self.win.title("Student Manager - Ultimate Fascinating Edition")
         self.win.geometry("1400x900")
         self.win.configure(bg=BG_MAIN)
 
-        # state variables
-        self.records = []
-        self.db_file = self.locate_db()
+        # state variables (records, indexes and the file live in the engine;
+        # a .sqlite / .db path picks the SQLite backend)
+        self.db_file = db_file or self.locate_db()
+        self.db = open_database(self.db_file)
+        self.history = EditHistory(self.db)  # Undo/redo steps and batched edits
         self.curr_sort_col = "percent"
         self.sort_desc = True
-
-        # Initial load
-        self.load_records()
+        self.loading = False      # The file is being read: edits wait, nothing is saved
+        self.importing = False    # A bulk import is being parsed: edits wait for it
+        self.load_failed = False  # The file could not be read: read-only until restart
+        self.load_progress = 0.0
+        self.load_text = "Loading students..."
+
+        # Background file I/O: edits wait in the engine until the next
+        # coalesced write, `saving` is True while a write is running
+        self.io = IOWorker(self.win)
+        self.saving = False
+        self.flush_job = None
+
+        # Virtual table state: `view` is the engine's filtered + sorted result,
+        # only the rows from `view_top` that fit on screen are fetched and
+        # exist as Treeview items
+        self.view = []
+        self.view_top = 0
+        self.page_rows = 1
+        self.row_iids = []
+        self.iid_code = {}
+        self.sel_code = None
+        self.search_job = None
+
+        # Building the UI first so the window shows while the file streams in
         self.init_interface()
-        self.populate_table()
+        self.win.bind("<Control-z>", lambda e: self.action_undo())
+        self.win.bind("<Control-y>", lambda e: self.action_redo())
+        self.start_loading()
+        self.win.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def locate_db(self):
-        filename = "studentMarks.txt"
-        current_dir = os.path.dirname(__file__)
-        
-        candidates = [
-            filename,
-            os.path.join(current_dir, filename),
-            f"resources/{filename}",
-            os.path.join(current_dir, "resources", filename)
-        ]
-
-        for path in candidates:
-            if os.path.exists(path):
-                return os.path.abspath(path)
-        
-        return filename
+        return locate_marks_file()
 
     def calculate_grade(self, percentage):
-        if percentage >= 70: return "A"
-        if percentage >= 60: return "B"
-        if percentage >= 50: return "C"
-        if percentage >= 40: return "D"
-        return "F"
-
-    def load_records(self):
-        self.records = []
-        
-        # Ensuring that file exists
-        if not os.path.exists(self.db_file):
-            with open(self.db_file, "w") as f:
-                f.write("0\n")
+        return calculate_grade(percentage)
+
+    def start_loading(self):
+        # Parsing runs on the I/O thread into a separate store, so the table
+        # never sees a half-built store
+        self.loading = True
+        self.load_progress = 0.0
+        self.load_text = "Loading students..."
+        self.show_busy(self.load_text, determinate=True)
+        self.io.submit(self.db.prepare_load, self.set_load_progress,
+                       on_done=lambda result: self.finish_loading(*result),
+                       on_error=lambda err: self.finish_loading(None, None, err))
+        self.win.after(100, self.watch_loading)
+
+    def set_load_progress(self, frac):
+        # Called from the I/O thread; a plain attribute write is read by watch_loading
+        self.load_progress = frac
+
+    def watch_loading(self):
+        if not (self.loading or self.importing):
             return
+        self.progress.config(value=self.load_progress * 100)
+        self.lbl_stats.config(text=f"{self.load_text} {self.load_progress * 100:.0f}%")
+        self.win.after(100, self.watch_loading)
+
+    def finish_loading(self, state, report, err=None):
+        self.loading = False
+        if err is None:
+            self.db.finish_load(state)
+            self.history.clear()
+        else:
+            # The store is still empty: saving anything now would overwrite the file
+            self.load_failed = True
+        self.hide_busy()
+        self.populate_table()
 
-        try:
-            with open(self.db_file, "r", encoding="utf-8") as f:
-                content = f.readlines()
-
-            # Processing lines and skipping empty ones
-            valid_lines = [x.strip() for x in content if x.strip()]
-            if not valid_lines: 
-                return
-
-            # Skipping the first line and processing the rest
-            for line in valid_lines[1:]:
-                parts = line.split(",")
-                if len(parts) < 6: 
-                    continue
-
-                # Parse data
-                code = parts[0].strip()
-                name = parts[1].strip()
-                c1 = int(parts[2])
-                c2 = int(parts[3])
-                c3 = int(parts[4])
-                exam = int(parts[5])
-
-                total_cw = c1 + c2 + c3
-                grand_total = total_cw + exam
-                pct = round((grand_total / 160) * 100, 2)
-                grade = self.calculate_grade(pct)
-
-                self.records.append({
-                    "code": code,
-                    "name": name,
-                    "cw1": c1, "cw2": c2, "cw3": c3,
-                    "coursework": total_cw,
-                    "exam": exam,
-                    "total": grand_total,
-                    "percent": pct,
-                    "grade": grade
-                })
-
-        except ValueError:
-            messagebox.showerror("Data Error", "Corrupt data found in file. Check number formats.")
-        except Exception as e:
-            messagebox.showerror("Load Error", f"Failed to read file:\n{e}")
+        if err is not None:
+            messagebox.showerror("Load Error", f"Failed to read file:\n{err}\n\n"
+                                 "Changes are disabled so the file is left untouched.")
+        elif not report.clean():
+            messagebox.showwarning("Data Problems", report.summary())
+
+    def still_loading(self):
+        # Editing before the file is fully read (or after it failed to load)
+        # would save a partial class
+        if self.load_failed:
+            messagebox.showwarning("Read Only", "The file could not be loaded, so changes are disabled.")
+            return True
+        if self.loading:
+            messagebox.showwarning("Loading", "Please wait until all records are loaded.")
+            return True
+        if self.importing:
+            messagebox.showwarning("Importing", "Please wait until the import has finished.")
+            return True
+        return False
+
+    def show_busy(self, text, determinate=False):
+        self.lbl_busy.config(text=text)
+        if self.progress.winfo_ismapped():
+            return
+        self.progress.pack(after=self.lbl_busy, pady=2)
+        if determinate:
+            self.progress.config(mode="determinate", value=0)
+        else:
+            self.progress.config(mode="indeterminate")
+            self.progress.start(15)
 
-    def save_records(self):
+    def hide_busy(self):
+        if self.loading or self.importing or self.saving or self.db.has_pending():
+            return
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.lbl_busy.config(text="")
+
+    def flush_for_reader(self):
+        # Saving queued edits before an import / export that reads the file
+        # itself (SQLite); returns False if that save failed
+        if not self.db.flush_before_read or self.saving:
+            return True
+        job = None
         try:
-            with open(self.db_file, "w", encoding="utf-8") as f:
-                f.write(f"{len(self.records)}\n")
-                for r in self.records:
-                    line = f"{r['code']},{r['name']},{r['cw1']},{r['cw2']},{r['cw3']},{r['exam']}\n"
-                    f.write(line)
+            job = self.db.save_job()  # SQLite commits right here
+            if job is not None:
+                job.run()
         except Exception as e:
-            messagebox.showerror("Save Error", f"Could not save changes:\n{e}")
+            self.finish_save(None, e, job)
+            return False
+        return True
+
+    def schedule_save(self):
+        # The engine queued an edit; a burst of edits becomes a single write
+        self.show_busy("Saving...")
+        if self.flush_job is None:
+            self.flush_job = self.win.after(SAVE_COALESCE_MS, self.flush_changes)
+
+    def flush_changes(self):
+        self.flush_job = None
+        if self.saving or not self.db.has_pending():
+            self.hide_busy()
+            return  # finish_save() flushes again once the running write is done
+
+        job = self.db.save_job()
+        if job is None:
+            self.hide_busy()  # The backend saved synchronously
+            return
+        self.saving = True
+        self.io.submit(job.run, on_done=self.finish_save, on_error=lambda e: self.finish_save(None, e, job))
+
+    def finish_save(self, result, err=None, job=None):
+        self.saving = False
+        if err is not None:
+            # Keeping the edits queued so the next save retries them
+            self.db.save_failed(job)
+            messagebox.showerror("Save Error", f"Could not save changes:\n{err}")
+        if self.db.has_pending() and self.flush_job is None:
+            self.flush_job = self.win.after(SAVE_COALESCE_MS, self.flush_changes)
+        self.hide_busy()
+
+    def on_close(self):
+        # Waiting for queued writes, then leaving the canonical file fully up to date
+        if self.flush_job is not None:
+            self.win.after_cancel(self.flush_job)
+        self.io.shutdown()
+        # Queued edits are saved even if an import was still running; only a
+        # load in progress (or a failed one) skips the save
+        if not (self.loading or self.load_failed):
+            try:
+                self.db.close()
+            except Exception as e:
+                messagebox.showerror("Save Error", f"Could not save changes:\n{e}")
+        self.win.destroy()
 
     def init_interface(self):
         # Sidebar layout
@@ -133,6 +264,11 @@ class StudentManager:
             ("Add Student", self.ui_add_student),
             ("Delete Student", self.action_delete),
             ("Update Student", self.ui_update_student),
+            ("Apply Corrections", self.action_apply_corrections),
+            ("Import CSV/TSV", self.action_import_csv),
+            ("Export View", self.action_export_view),
+            ("Undo", self.action_undo),
+            ("Redo", self.action_redo),
         ]
 
         for txt, func in menu_items:
@@ -155,6 +291,11 @@ class StudentManager:
                                   font=("Arial", 16), bg=BG_MAIN, fg="#8be9fd")
         self.lbl_stats.pack(pady=10)
 
+        # Busy indicator for background loads and saves (only shown while working)
+        self.lbl_busy = tk.Label(pnl_main, text="", font=("Arial", 11, "italic"), bg=BG_MAIN, fg="#f1fa8c")
+        self.lbl_busy.pack()
+        self.progress = ttk.Progressbar(pnl_main, length=300, maximum=100)
+
         # Adding a Search Bar
         pnl_search = tk.Frame(pnl_main, bg=BG_MAIN)
         pnl_search.pack(fill="x", pady=10)
@@ -162,7 +303,7 @@ class StudentManager:
         tk.Label(pnl_search, text="Search:", bg=BG_MAIN, fg="#f1fa8c", font=("Arial", 14)).pack(side="left", padx=20)
         
         self.search_val = tk.StringVar()
-        self.search_val.trace("w", lambda *args: self.populate_table()) # Adding Auto search on type
+        self.search_val.trace("w", lambda *args: self.schedule_search()) # Adding Auto search on type
         
         ent_search = tk.Entry(pnl_search, textvariable=self.search_val, font=("Arial", 14), 
                               bg=BTN_BG, fg="white", insertbackground="white", width=50)
@@ -175,7 +316,7 @@ class StudentManager:
         # Style config
         style = ttk.Style()
         style.theme_use("clam")
-        style.configure("Treeview", background=BG_SIDE, foreground=FG_TEXT, fieldbackground=BG_SIDE, rowheight=40, font=("Arial", 12))
+        style.configure("Treeview", background=BG_SIDE, foreground=FG_TEXT, fieldbackground=BG_SIDE, rowheight=ROW_HEIGHT, font=("Arial", 12))
         style.configure("Treeview.Heading", background=BTN_BG, foreground=ACCENT, font=("Arial", 13, "bold"))
         style.map("Treeview", background=[("selected", BTN_HOVER)])
 
@@ -201,10 +342,16 @@ class StudentManager:
 
         self.tree.pack(fill="both", expand=True, pady=10)
 
-        # Adding a Scrollbar
-        sb = ttk.Scrollbar(parent, orient="vertical", command=self.tree.yview)
-        sb.pack(side="right", fill="y")
-        self.tree.configure(yscrollcommand=sb.set)
+        # Adding a Scrollbar (driven by our own row window, not the Treeview)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # Scrolling, resizing and selection events for the virtual table
+        self.tree.bind("<MouseWheel>", lambda e: self.on_wheel(-1 if e.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda e: self.on_wheel(-1))
+        self.tree.bind("<Button-5>", lambda e: self.on_wheel(1))
+        self.tree.bind("<Configure>", self.on_tree_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
 
         # Adding Row Tags for Grade Colors
         color_map = {
@@ -215,37 +362,114 @@ class StudentManager:
             self.tree.tag_configure(g, background=col, foreground=BG_SIDE)
 
     def update_stats_display(self):
-        total = len(self.records)
-        avg_score = 0
-        if total > 0:
-            avg_score = sum(r["percent"] for r in self.records) / total
-        self.lbl_stats.config(text=f"Total Students: {total} | Average %: {avg_score:.2f}")
+        info = self.db.summary()
+        self.lbl_stats.config(text=f"Total Students: {info['count']} | Average %: {info['average']:.2f} | "
+                                   f"Median %: {info['median']:.2f}")
 
+    @perf.timed("ui.populate_table")
     def populate_table(self):
-        # Clear existing
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
         search_term = self.search_val.get().lower()
         
-        # Sorting logic
-        display_data = sorted(self.records, key=lambda x: x.get(self.curr_sort_col, 0), reverse=self.sort_desc)
-
-        for r in display_data:
-            # Adding Filter
-            if search_term in r["name"].lower() or search_term in r["code"]:
-                vals = (
-                    r["code"], 
-                    r["name"], 
-                    r["coursework"], 
-                    r["exam"], 
-                    f"{r['percent']:.2f}", 
-                    r["grade"]
-                )
-                self.tree.insert("", "end", values=vals, tags=(r["grade"],))
-        
+        # Sorting and filtering happen in the engine (indexes or SQL); rows
+        # are only fetched for the part of the view on screen
+        self.view = self.db.view(self.curr_sort_col, self.sort_desc, search_term)
+
+        # Forgetting a selection that was deleted or is filtered out, so
+        # Update / Delete never act on a student the table no longer shows
+        if self.sel_code is not None:
+            row = self.db.get(self.sel_code)
+            if row is None or (search_term and search_term not in row["name"].lower()
+                               and not row["code"].startswith(search_term)):
+                self.sel_code = None
+
+        self.render_window()
         self.update_stats_display()
 
+    def schedule_search(self):
+        # Debouncing: only the last keystroke in a fast burst refreshes the table
+        if self.search_job is not None:
+            self.win.after_cancel(self.search_job)
+        self.search_job = self.win.after(SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        self.view_top = 0
+        self.populate_table()
+
+    @perf.timed("ui.treeview")
+    def render_window(self):
+        # Filling the recycled Treeview items with the rows currently in view
+        total = len(self.view)
+        self.view_top = max(0, min(self.view_top, total - self.page_rows))
+        rows = self.view.page(self.view_top, len(self.row_iids)) if total else []
+        self.iid_code = {}
+        selected = []
+
+        for k, iid in enumerate(self.row_iids):
+            if k >= len(rows):
+                self.tree.detach(iid)
+                continue
+
+            r = rows[k]
+            vals = (
+                r["code"], 
+                r["name"], 
+                r["coursework"], 
+                r["exam"], 
+                f"{r['percent']:.2f}", 
+                r["grade"]
+            )
+            self.tree.item(iid, values=vals, tags=(r["grade"],))
+            self.tree.move(iid, "", k)  # Re-attach if it was hidden
+            self.iid_code[iid] = r["code"]
+            if r["code"] == self.sel_code:
+                selected.append(iid)
+
+        self.tree.selection_set(selected)
+
+        if total:
+            self.scrollbar.set(self.view_top / total, min(1.0, (self.view_top + self.page_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_scroll(self, action, amount, unit=None):
+        # Scrollbar callback: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+        if action == "moveto":
+            self.view_top = int(float(amount) * len(self.view))
+        else:
+            step = self.page_rows if unit == "pages" else 1
+            self.view_top += int(amount) * step
+        self.render_window()
+
+    def on_wheel(self, direction):
+        self.on_scroll("scroll", direction * 3, "units")
+        return "break"  # Stop the Treeview from scrolling its own few items
+
+    def on_tree_resize(self, event):
+        # Keeping one Treeview item per visible row (plus one partly visible)
+        self.page_rows = max(1, (event.height - HEADING_HEIGHT) // ROW_HEIGHT)
+        wanted = self.page_rows + 1
+
+        while len(self.row_iids) < wanted:
+            self.row_iids.append(self.tree.insert("", "end"))
+        while len(self.row_iids) > wanted:
+            self.tree.delete(self.row_iids.pop())
+
+        self.render_window()
+
+    def on_select(self, event):
+        # Remembering the selection by code so it survives item recycling
+        sel = self.tree.selection()
+        if sel and sel[0] in self.iid_code:
+            self.sel_code = self.iid_code[sel[0]]
+
+    def selected_code(self):
+        if self.sel_code is not None and self.db.get(self.sel_code) is not None:
+            return self.sel_code
+        self.sel_code = None
+        messagebox.showwarning("Select", "Select a student from the table first.")
+        return None
+
     def sort_data(self, col_key):
         # Toggle the direction if clicking same column
         if self.curr_sort_col == col_key:
@@ -260,19 +484,19 @@ class StudentManager:
 
     def action_view_all(self):
         self.populate_table()
-        count = len(self.records)
-        avg = sum(r["percent"] for r in self.records) / count if count else 0
-        messagebox.showinfo("Class Summary", f"Students: {count}\nAverage: {avg:.2f}%")
+        info = self.db.summary()
+        grades = ", ".join(f"{g}: {n}" for g, n in info["grades"].items())
+        messagebox.showinfo("Class Summary", 
+                            f"Students: {info['count']}\nAverage: {info['average']:.2f}%\n"
+                            f"Median: {info['median']:.2f}%\n"
+                            f"25th / 75th percentile: {info['p25']:.2f}% / {info['p75']:.2f}%\n"
+                            f"Grades - {grades}")
 
     def action_find_one(self):
         q = simpledialog.askstring("Search Student", "Enter name or code:")
         if not q: return
 
-        found = None
-        for r in self.records:
-            if q == r["code"] or q.lower() in r["name"].lower():
-                found = r
-                break
+        found = self.db.find(q)
         
         if found:
             details = (f"Name: {found['name']}\nCode: {found['code']}\n"
@@ -285,16 +509,16 @@ class StudentManager:
             messagebox.showwarning("Not Found", "Student not found.")
 
     def action_highest(self):
-        if not self.records: return
-        top = max(self.records, key=lambda x: x["percent"])
+        top = self.db.highest()
+        if not top: return
         info = (f"Name: {top['name']}\nCode: {top['code']}\n"
                 f"Coursework: {top['coursework']}/60\nExam: {top['exam']}/100\n"
                 f"Percent: {top['percent']:.2f}%\nGrade: {top['grade']}")
         messagebox.showinfo("Highest Score", info)
 
     def action_lowest(self):
-        if not self.records: return
-        low = min(self.records, key=lambda x: x["percent"])
+        low = self.db.lowest()
+        if not low: return
         info = (f"Name: {low['name']}\nCode: {low['code']}\n"
                 f"Coursework: {low['coursework']}/60\nExam: {low['exam']}/100\n"
                 f"Percent: {low['percent']:.2f}%\nGrade: {low['grade']}")
@@ -305,23 +529,127 @@ class StudentManager:
         messagebox.showinfo("Sorted", "Records sorted by percentage (descending). Click headers for more.")
 
     def action_delete(self):
-        cur = self.tree.selection()
-        if not cur:
-            messagebox.showwarning("Select", "Select a student from the table first.")
-            return
-
-        row_vals = self.tree.item(cur[0])["values"]
-        s_code = str(row_vals[0]) # ensure string for comparison
-        s_name = row_vals[1]
+        if self.still_loading(): return
+        s_code = self.selected_code()
+        if s_code is None: return
+        s_name = self.db.get(s_code)["name"]
 
         confirm = messagebox.askyesno("Confirm Delete", f"Delete student {s_code} - {s_name}?")
         if confirm:
-            # Filter out the deleted student
-            self.records = [x for x in self.records if str(x["code"]) != s_code]
-            self.save_records()
+            # Removing the deleted student's row through the code index
+            if self.db.get(s_code) is not None:
+                self.history.delete(s_code)
+                self.schedule_save()
             self.populate_table()
             messagebox.showinfo("Deleted", "Student removed successfully!")
 
+    def action_apply_corrections(self):
+        # A whole moderation file goes in as one batch: one save, one table
+        # refresh and one undo step, and nothing changes if any line is bad
+        if self.still_loading(): return
+        path = filedialog.askopenfilename(title="Corrections file (code,cw1,cw2,cw3,exam)",
+                                          filetypes=[("Text / CSV", "*.txt *.csv"), ("All files", "*.*")])
+        if not path: return
+
+        try:
+            changed = self.history.apply_corrections(path)
+        except (InvalidRecordError, OSError) as e:
+            messagebox.showerror("Corrections", f"{e}\nNo changes were applied.")
+            return
+
+        self.schedule_save()
+        self.populate_table()
+        messagebox.showinfo("Corrections", f"Updated {changed} students. Use Undo to revert them.")
+
+    def action_import_csv(self):
+        # Parsing runs on the I/O thread like the initial load; the rows are
+        # merged (and saved once) when it finishes
+        if self.still_loading(): return
+        path = filedialog.askopenfilename(title="Import students",
+                                          filetypes=[("CSV / TSV", "*.csv *.tsv *.txt"), ("All files", "*.*")])
+        if not path: return
+        text = simpledialog.askstring("Column Mapping",
+                                      "Columns are matched by header name (code, name, cw1, cw2, cw3, exam).\n"
+                                      "To map others, enter e.g. code=ID, name=Student, exam=Final\n"
+                                      "or leave this empty:")
+        if text is None: return
+        try:
+            mapping = parse_mapping(text)
+        except InvalidRecordError as e:
+            messagebox.showerror("Column Mapping", str(e))
+            return
+
+        if not self.flush_for_reader():
+            return
+        report = LoadReport()
+        batches = iter_csv_batches(path, mapping, report, progress=self.set_load_progress)
+        self.importing = True
+        self.load_progress = 0.0
+        self.load_text = "Importing students..."
+        self.show_busy(self.load_text, determinate=True)
+        self.io.submit(self.db.prepare_import, batches, report,
+                       on_done=lambda state: self.finish_import(state, report),
+                       on_error=lambda err: self.finish_import(None, report, err))
+        self.win.after(100, self.watch_loading)
+
+    def finish_import(self, state, report, err=None):
+        self.importing = False
+        if err is None:
+            self.db.finish_import(state, report)
+            self.history.clear()  # Recorded steps may clash with the imported students
+            self.schedule_save()
+        self.hide_busy()
+        self.populate_table()
+
+        if err is not None:
+            messagebox.showerror("Import Error", f"Nothing was imported:\n{err}")
+        elif not report.clean():
+            messagebox.showwarning("Import", report.summary(save_note=False))
+        else:
+            messagebox.showinfo("Import", f"Imported {report.loaded} students.")
+
+    def action_export_view(self):
+        # Writes the table as it is filtered and sorted now, with the derived
+        # columns; the rows are frozen here and written on the I/O thread
+        if self.still_loading(): return
+        path = filedialog.asksaveasfilename(title="Export view", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("TSV", "*.tsv")])
+        if not path: return
+
+        if not self.flush_for_reader():
+            return
+        self.show_busy("Exporting...")
+        self.io.submit(write_rows, self.view.detached(), path,
+                       on_done=lambda n: self.finish_export(path, n),
+                       on_error=lambda err: self.finish_export(path, None, err))
+
+    def finish_export(self, path, count, err=None):
+        self.hide_busy()
+        if err is not None:
+            messagebox.showerror("Export Error", f"Could not export:\n{err}")
+        else:
+            messagebox.showinfo("Export", f"Wrote {count} students to {path}")
+
+    def action_undo(self):
+        self.step_history(self.history.undo, "Undo")
+
+    def action_redo(self):
+        self.step_history(self.history.redo, "Redo")
+
+    def step_history(self, step, title):
+        if self.still_loading(): return
+        try:
+            changed = step()
+        except (DuplicateCodeError, InvalidRecordError, KeyError) as e:
+            messagebox.showerror(title, f"Could not {title.lower()} the last change:\n{e}\n"
+                                 "No students were changed.")
+            return
+        if changed:
+            self.schedule_save()
+            self.populate_table()
+        else:
+            messagebox.showinfo(title, f"Nothing to {title.lower()}.")
+
     # Adding or Updating Modals
 
     def create_input_modal(self, title, btn_text, cmd_callback, defaults=None):
@@ -357,6 +685,7 @@ class StudentManager:
         action_btn.pack(pady=20)
 
     def ui_add_student(self):
+        if self.still_loading(): return
         self.create_input_modal("Add New Student", "Add", self.process_add)
 
     def process_add(self, fields, window):
@@ -369,52 +698,43 @@ class StudentManager:
             cw3 = int(fields[4].get())
             exam = int(fields[5].get())
 
-            # Calculating
-            cw_total = cw1 + cw2 + cw3
-            final = cw_total + exam
-            pct = round((final / 160) * 100, 2)
-            grd = self.calculate_grade(pct)
-
-            # For Storing
-            self.records.append({
-                "code": code, "name": name, 
-                "cw1": cw1, "cw2": cw2, "cw3": cw3,
-                "coursework": cw_total, "exam": exam, 
-                "total": final, "percent": pct, "grade": grd
-            })
+            # Storing (derived marks are calculated by the store)
+            self.history.add(code, name, cw1, cw2, cw3, exam)
             
-            self.save_records()
+            self.schedule_save()
             self.populate_table()
             window.destroy()
             messagebox.showinfo("Success", "Student added!")
 
+        except DuplicateCodeError as e:
+            messagebox.showerror("Duplicate Code", str(e))
+        except InvalidRecordError as e:
+            messagebox.showerror("Input Error", str(e))
         except ValueError:
             messagebox.showerror("Input Error", "Please ensure marks are numbers.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def ui_update_student(self):
-        sel = self.tree.selection()
-        if not sel:
-            messagebox.showwarning("Select", "Select a student from the table first.")
-            return
+        if self.still_loading(): return
+        code_val = self.selected_code()
+        if code_val is None: return
 
         # For Finding data
-        code_val = str(self.tree.item(sel[0])["values"][0])
-        student = next((x for x in self.records if str(x["code"]) == code_val), None)
+        student = self.db.get(code_val)
         
         if not student: return
 
         # Prefill data
         current_data = [student["name"], student["cw1"], student["cw2"], student["cw3"], student["exam"]]
         
-        # Pass the student object to the callback using a helper wrapper
+        # Pass the student code to the callback using a helper wrapper
         def callback_wrapper(entries, win):
-            self.process_update(student, entries, win)
+            self.process_update(code_val, entries, win)
 
         self.create_input_modal("Update Student", "Update", callback_wrapper, defaults=current_data)
 
-    def process_update(self, student_dict, fields, window):
+    def process_update(self, code, fields, window):
         try:
             name = fields[0].get().strip()
             cw1 = int(fields[1].get())
@@ -422,33 +742,33 @@ class StudentManager:
             cw3 = int(fields[3].get())
             exam = int(fields[4].get())
 
-            cw_total = cw1 + cw2 + cw3
-            final = cw_total + exam
-            pct = round((final / 160) * 100, 2)
-            grd = self.calculate_grade(pct)
-
-            # Update dictionary in place
-            student_dict.update({
-                "name": name,
-                "cw1": cw1, "cw2": cw2, "cw3": cw3,
-                "coursework": cw_total,
-                "exam": exam,
-                "total": final,
-                "percent": pct,
-                "grade": grd
-            })
-
-            self.save_records()
+            # Update the row in place
+            if self.db.get(code) is None:
+                messagebox.showerror("Error", "This student no longer exists.")
+                return
+            self.history.update(code, name, cw1, cw2, cw3, exam)
+
+            self.schedule_save()
             self.populate_table()
             window.destroy()
             messagebox.showinfo("Success", "Student updated successfully!")
 
+        except InvalidRecordError as e:
+            messagebox.showerror("Input Error", str(e))
         except ValueError:
             messagebox.showerror("Input Error", "Please ensure marks are numbers.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Student Manager")
+    parser.add_argument("file", nargs="?", help="marks file or .sqlite database to open")
+    parser.add_argument("--perf", action="store_true", help="print operation timings on exit")
+    parser.add_argument("--profile", metavar="FILE", help="also write cProfile stats to FILE")
+    args = parser.parse_args()
+    if args.perf or args.profile:
+        perf.enable(args.profile)
+
     root = tk.Tk()
-    app = StudentManager(root)
+    app = StudentManager(root, args.file)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,56 @@
+# CSV/TSV throughput benchmark: streaming import (parse only, text store,
+# SQLite) and streaming export of a sorted view, in rows per second
+# Usage: python bench_csv.py [rows]
+import csv
+import os
+import sys
+import tempfile
+import time
+
+from student_core import LoadReport, StudentDatabase
+from student_csv import iter_csv_batches, parse_mapping, write_rows
+from student_sqlite import SqliteDatabase
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from cohort import student_rows
+
+def write_roster(path, n):
+    # Spreadsheet-style columns in a different order, so the mapping is exercised
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Student", "Final", "ID", "CW 1", "CW 2", "CW 3"])
+        for code, name, c1, c2, c3, exam in student_rows(n):
+            writer.writerow([name, exam, code, c1, c2, c3])
+
+def timed(label, n, fn):
+    start = time.perf_counter()
+    fn()
+    took = time.perf_counter() - start
+    print(f"{label:<22} {took:>8.2f} s {n / took:>12,.0f} rows/s")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    mapping = parse_mapping("code=ID, name=Student, cw1=CW 1, cw2=CW 2, cw3=CW 3, exam=Final")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roster = os.path.join(tmp, "roster.csv")
+        write_roster(roster, n)
+        print(f"{n} rows, {os.path.getsize(roster) / 2**20:.1f} MiB CSV")
+
+        def parse_only():
+            for batch, _ in iter_csv_batches(roster, mapping):
+                pass
+        timed("parse", n, parse_only)
+
+        text_db = StudentDatabase(os.path.join(tmp, "marks.txt"))
+        timed("import -> text file", n,
+              lambda: text_db.import_batches(iter_csv_batches(roster, mapping), LoadReport()))
+
+        sql_db = SqliteDatabase(os.path.join(tmp, "marks.sqlite"))
+        timed("import -> SQLite", n,
+              lambda: sql_db.import_batches(iter_csv_batches(roster, mapping), LoadReport()))
+
+        out = os.path.join(tmp, "view.tsv")
+        timed("export text view", n, lambda: write_rows(text_db.view("name", False).detached(), out))
+        timed("export SQLite view", n, lambda: write_rows(sql_db.view("name", False).detached(), out))
+        sql_db.close()
@@ -0,0 +1,52 @@
+# Grading benchmark: per-row derived fields vs the batch grade_columns() path
+# Usage: python bench_grading.py [max_rows]
+import os
+import sys
+import time
+from array import array
+
+from student_core import StudentStore, calculate_grade, grade_columns, np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from cohort import student_rows
+
+def per_row(cw1, cw2, cw3, exam):
+    # What load/add/update used to do for every single row
+    out = []
+    for c1, c2, c3, ex in zip(cw1, cw2, cw3, exam):
+        total = c1 + c2 + c3 + ex
+        pct = round((total / 160) * 100, 2)
+        out.append((total, pct, calculate_grade(pct)))
+    return out
+
+def columns(n, seed=1):
+    cols = tuple(array("h") for _ in range(4))
+    for row in student_rows(n, seed):
+        for col, mark in zip(cols, row[2:]):
+            col.append(mark)
+    return cols
+
+def best_of(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sizes = [n for n in (100_000, 1_000_000, 10_000_000) if n <= max_rows]
+
+    print(f"{'rows':>10} {'per-row s':>10} {'batch s':>9} {'numpy s':>9} {'regrade s':>10}")
+    for n in sizes:
+        cols = columns(n)
+        slow = best_of(per_row, *cols)
+        batch = best_of(grade_columns, *cols)
+        vec = best_of(grade_columns, *(np.asarray(c, dtype=np.int32) for c in cols)) if np is not None else float("nan")
+
+        store = StudentStore()
+        store.extend_columns([str(i) for i in range(n)], ["x"] * n, *cols)
+        regrade = best_of(store.regrade_all)
+
+        print(f"{n:>10} {slow:>10.3f} {batch:>9.3f} {vec:>9.3f} {regrade:>10.3f}")
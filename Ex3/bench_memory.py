@@ -0,0 +1,47 @@
+# Memory benchmark: old list-of-dicts layout vs the columnar StudentStore
+# Usage: python bench_memory.py [rows]
+import os
+import sys
+import tracemalloc
+
+from student_core import StudentStore, calculate_grade, percent_of
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from cohort import student_rows
+
+def build_dicts(rows):
+    # The layout StudentManager used before the columnar store
+    records = []
+    for code, name, c1, c2, c3, exam in rows:
+        cw = c1 + c2 + c3
+        total = cw + exam
+        pct = percent_of(total)
+        records.append({
+            "code": code, "name": name,
+            "cw1": c1, "cw2": c2, "cw3": c3,
+            "coursework": cw, "exam": exam,
+            "total": total, "percent": pct, "grade": calculate_grade(pct)
+        })
+    return records
+
+def build_store(rows):
+    store = StudentStore()
+    store.extend(rows)
+    return store
+
+def measure(builder, n):
+    tracemalloc.start()
+    data = builder(student_rows(n))
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return used
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dict_bytes = measure(build_dicts, n)
+    store_bytes = measure(build_store, n)
+    print(f"rows: {n}")
+    print(f"list of dicts : {dict_bytes / 2**20:8.1f} MiB ({dict_bytes / n:6.1f} B/row)")
+    print(f"columnar store: {store_bytes / 2**20:8.1f} MiB ({store_bytes / n:6.1f} B/row)")
+    print(f"saving        : {dict_bytes / store_bytes:8.1f}x")
@@ -0,0 +1,35 @@
+# Edit latency benchmark: full rewrite vs journaled single-row edit
+# Usage: python bench_save.py [max_rows]
+import os
+import sys
+import tempfile
+import time
+
+from student_core import MarksFile, StudentStore
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from cohort import student_rows
+
+def time_edits(fn, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return (time.perf_counter() - start) / repeat
+
+if __name__ == "__main__":
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000, 10_000_000) if n <= max_rows]
+
+    print(f"{'rows':>10} {'file MiB':>9} {'rewrite ms':>11} {'journal us':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            store = StudentStore()
+            store.extend(student_rows(n))
+            storage = MarksFile(os.path.join(tmp, f"marks_{n}.txt"))
+            storage.write_all(store)
+            code = store.codes[0]
+
+            rewrite = time_edits(lambda i: storage.write_all(store), 3)
+            journal = time_edits(lambda i: storage.log("~", code, store), 1000)
+
+            print(f"{n:>10} {storage.base_size() / 2**20:>9.1f} {rewrite * 1e3:>11.1f} {journal * 1e6:>11.1f}")
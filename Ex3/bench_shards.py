@@ -0,0 +1,40 @@
+# Sharded import benchmark: parse + grade + merge time for 1-16 worker processes
+# Usage: python bench_shards.py [shards] [rows_per_shard]
+import os
+import sys
+import tempfile
+import time
+
+from student_core import MarksFile, StudentStore, find_shards, import_shards
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from cohort import student_rows
+
+WORKERS = (1, 2, 4, 8, 16)
+
+def write_shards(folder, shards, rows):
+    # Every shard gets its own slice of the cohort, so there are no collisions
+    for s in range(shards):
+        store = StudentStore()
+        store.extend(student_rows(rows, start=s * rows))
+        MarksFile(os.path.join(folder, f"dept_{s:02d}.txt"), use_snapshot=False).write_all(store)
+
+if __name__ == "__main__":
+    shards = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_shards(tmp, shards, rows)
+        paths = find_shards(tmp)
+        print(f"{shards} shards x {rows} rows, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'seconds':>8} {'rows/s':>11} {'speedup':>8}")
+
+        base = None
+        for workers in WORKERS:
+            start = time.perf_counter()
+            store = StudentStore()
+            report = import_shards(paths, store, workers)
+            took = time.perf_counter() - start
+            assert report.clean() and len(store) == shards * rows
+            base = base or took
+            print(f"{workers:>8} {took:>8.2f} {len(store) / took:>11,.0f} {base / took:>7.2f}x")
@@ -0,0 +1,184 @@
+# Command-line front end for the Student Manager engine (no Tk needed)
+# Usage:
+#   python student_cli.py grade [--out grades.csv]
+#   python student_cli.py stats
+#   python student_cli.py top-n -n 5 [--lowest]
+#   python student_cli.py export OUT [--sort total] [--asc] [--search smith]
+#   python student_cli.py --shards depts/ -j 8 stats     (many files merged)
+#   python student_cli.py --shards "depts/*.txt" merge all.txt
+#   python student_cli.py -f marks.sqlite import studentMarks.txt   (text -> SQLite)
+#   python student_cli.py -f marks.sqlite export-marks out.txt      (SQLite -> text)
+#   python student_cli.py apply corrections.txt    (code,cw1,cw2,cw3,exam per line)
+#   python student_cli.py import roster.csv --map "code=ID, name=Student"
+#   python student_cli.py export view.tsv --sort name --asc
+import argparse
+import csv
+import os
+import sys
+
+import student_perf as perf
+
+from student_core import (EditHistory, InvalidRecordError, LoadReport, find_shards, grade_columns,
+                          locate_marks_file, open_database)
+from student_csv import EXPORT_HEADER, iter_csv_batches, parse_mapping, write_rows, write_stream
+
+CSV_EXTENSIONS = (".csv", ".tsv", ".tab")
+
+SORT_KEYS = ("code", "name", "coursework", "exam", "percent", "grade", "total")
+
+def open_out(path):
+    # "-" (or nothing) means stdout
+    if not path or path == "-":
+        return sys.stdout
+    return open(path, "w", newline="", encoding="utf-8")
+
+def cmd_grade(db, args):
+    # Batch grading straight from the mark columns, in file order
+    out = open_out(args.out)
+    try:
+        writer = csv.writer(out)
+        writer.writerow(EXPORT_HEADER)
+        for codes, names, cw1, cw2, cw3, exam in db.iter_columns():
+            totals, pcts, grades = grade_columns(cw1, cw2, cw3, exam)
+            for i in range(len(codes)):
+                writer.writerow([codes[i], names[i], cw1[i], cw2[i], cw3[i], exam[i],
+                                 cw1[i] + cw2[i] + cw3[i], totals[i], f"{pcts[i]:.2f}", grades[i]])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+def cmd_stats(db, args):
+    info = db.summary()
+    print(f"Students: {info['count']}")
+    print(f"Average: {info['average']:.2f}%")
+    print(f"Median: {info['median']:.2f}%")
+    print(f"25th / 75th percentile: {info['p25']:.2f}% / {info['p75']:.2f}%")
+    print("Grades - " + ", ".join(f"{g}: {n}" for g, n in info["grades"].items()))
+
+def cmd_top(db, args):
+    for rank, r in enumerate(db.top(args.n, lowest=args.lowest), 1):
+        print(f"{rank:>3}. {r['code']}  {r['name']:<30} {r['percent']:6.2f}%  {r['grade']}")
+
+def cmd_export(db, args):
+    # Same ordering and filtering as the GUI table, streamed (tab-separated for .tsv)
+    view = db.view(args.sort, not args.asc, args.search.lower())
+    if args.out == "-":
+        write_stream(sys.stdout, view.detached())
+    else:
+        write_rows(view.detached(), args.out)
+
+def cmd_export_marks(db, args):
+    # Writing everything loaded (e.g. merged shards) as one ordinary marks file
+    db.export_marks(args.out)
+    print(f"Wrote {db.summary()['count']} students to {args.out}")
+
+def cmd_import(db, args):
+    # .csv / .tsv files go through the column mapping, anything else is a marks file
+    report = LoadReport()
+    if os.path.splitext(args.src)[1].lower() in CSV_EXTENSIONS:
+        try:
+            batches = iter_csv_batches(args.src, parse_mapping(args.map), report)
+            report = db.import_batches(batches, report)
+        except InvalidRecordError as e:
+            print(e, file=sys.stderr)
+            return 1
+    else:
+        report = db.import_marks(args.src)
+    if not report.clean():
+        print(report.summary(save_note=False), file=sys.stderr)
+    print(f"Imported {report.loaded} students into {db.path}")
+
+def cmd_apply(db, args):
+    # All corrections or none, then a single save
+    try:
+        changed = EditHistory(db).apply_corrections(args.corrections)
+    except InvalidRecordError as e:
+        print(f"{e} No changes were applied.", file=sys.stderr)
+        return 1
+    db.flush()
+    print(f"Updated {changed} students in {db.path}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch grading and reports for the student marks file.")
+    parser.add_argument("-f", "--file", default=None,
+                        help="marks file, or a .sqlite/.db database (default: studentMarks.txt)")
+    parser.add_argument("--no-snapshot", action="store_true", help="ignore the binary snapshot cache")
+    parser.add_argument("--shards", metavar="DIR_OR_GLOB",
+                        help="merge many marks files instead of one (read-only commands only)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="processes for --shards (default: one per CPU)")
+    parser.add_argument("--perf", action="store_true", help="print operation timings on exit")
+    parser.add_argument("--profile", metavar="FILE", help="also write cProfile stats to FILE")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("grade", help="write every student with derived marks as CSV")
+    p.add_argument("--out", default="-", help="output file (default: stdout)")
+    p.set_defaults(run=cmd_grade)
+
+    p = sub.add_parser("stats", help="print class statistics")
+    p.set_defaults(run=cmd_stats)
+
+    p = sub.add_parser("top-n", help="print the best (or worst) students by percentage")
+    p.add_argument("-n", type=int, default=10)
+    p.add_argument("--lowest", action="store_true")
+    p.set_defaults(run=cmd_top)
+
+    p = sub.add_parser("export", help="export a sorted / filtered view as CSV")
+    p.add_argument("out", help="output file, or - for stdout")
+    p.add_argument("--sort", choices=SORT_KEYS, default="percent")
+    p.add_argument("--asc", action="store_true", help="ascending order (default: descending)")
+    p.add_argument("--search", default="", help="only rows whose name contains this or whose code starts with it")
+    p.set_defaults(run=cmd_export)
+
+    p = sub.add_parser("export-marks", aliases=["merge"],
+                       help="write all loaded students to one text marks file (e.g. merged --shards)")
+    p.add_argument("out")
+    p.set_defaults(run=cmd_export_marks)
+
+    p = sub.add_parser("import", help="add every student from a marks, CSV or TSV file to --file")
+    p.add_argument("src")
+    p.add_argument("--map", default="", help='CSV column mapping, e.g. "code=ID, name=Student, exam=3"')
+    p.set_defaults(run=cmd_import, writes=True)
+
+    p = sub.add_parser("apply", help="apply a moderation corrections file as one batch")
+    p.add_argument("corrections")
+    p.set_defaults(run=cmd_apply, writes=True)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.shards and getattr(args, "writes", False):
+        # The merged shards are read-only; saving them would overwrite --file
+        parser.error(f"{args.command} changes --file and cannot be used with --shards "
+                     "(merge the shards into a file first)")
+    if args.perf or args.profile:
+        perf.enable(args.profile)
+    db = open_database(args.file or locate_marks_file(), use_snapshot=not args.no_snapshot)
+    try:
+        if args.shards:
+            if not hasattr(db, "load_shards"):
+                print("--shards needs a text marks file for --file", file=sys.stderr)
+                return 1
+            paths = find_shards(args.shards)
+            if not paths:
+                print(f"No marks files match {args.shards}", file=sys.stderr)
+                return 1
+            report = db.load_shards(paths, args.workers)
+        else:
+            report = db.load()
+    except OSError as e:
+        print(f"Failed to read file: {e}", file=sys.stderr)
+        return 1
+    if not report.clean():
+        print(report.summary(), file=sys.stderr)
+    try:
+        return args.run(db, args) or 0
+    finally:
+        if getattr(args, "writes", False):
+            # Folding the journal back in, so other tools reading the marks
+            # file see the change (and SQLite's connection is closed)
+            db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
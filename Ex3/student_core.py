@@ -0,0 +1,1498 @@
+# Student Manager core: records, indexes, parsing and the marks file.
+# Nothing in here imports tkinter, so it can run headless (see student_cli.py).
+import os
+import sys
+import bisect
+import glob
+import mmap
+import struct
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import student_perf as perf
+
+try:
+    import numpy as np  # Optional, only used for the vectorized grading path
+except ImportError:
+    np = None
+
+DEFAULT_FILENAME = "studentMarks.txt"
+
+# Reading the marks file in fixed-size chunks keeps memory flat on huge classes
+CHUNK_SIZE = 1 << 20  # 1 MiB per read
+
+def calculate_grade(percentage):
+    if percentage >= 70: return "A"
+    if percentage >= 60: return "B"
+    if percentage >= 50: return "C"
+    if percentage >= 40: return "D"
+    return "F"
+
+def percent_of(total):
+    return round((total / 160) * 100, 2)
+
+MARK_COLUMNS = ("cw1", "cw2", "cw3", "exam")
+
+# Totals are whole numbers from 0 to 160, so percent and grade can be looked
+# up per total instead of re-rounding and walking the if-chain for every row
+MAX_TOTAL = 160
+PCT_BY_TOTAL = [percent_of(t) for t in range(MAX_TOTAL + 1)]
+GRADE_BY_TOTAL = "".join(calculate_grade(p) for p in PCT_BY_TOTAL)
+GRADE_TABLE = GRADE_BY_TOTAL.encode().ljust(256, b"?")  # bytes.translate table
+GRADE_BOUNDS = (40, 50, 60, 70)
+GRADE_LETTERS = "FDCBA"
+
+def total_column(cw1, cw2, cw3, exam):
+    # Element-wise sum of the four mark columns
+    if np is not None and isinstance(cw1, np.ndarray):
+        return cw1 + cw2 + cw3 + exam
+    return list(map(sum, zip(cw1, cw2, cw3, exam)))
+
+def grade_columns(cw1, cw2, cw3, exam):
+    # Batch grading: whole mark columns in, (totals, percents, grades) out.
+    # With NumPy arrays the grades come from one searchsorted over the grade
+    # boundaries; otherwise totals index the lookup tables and the grade
+    # letters are produced by a single bytes.translate call.
+    totals = total_column(cw1, cw2, cw3, exam)
+    if not len(totals):
+        return totals, [], ""
+
+    if np is not None and isinstance(totals, np.ndarray):
+        pct = np.round(totals / 160 * 100, 2)
+        grades = np.array(list(GRADE_LETTERS))[np.searchsorted(GRADE_BOUNDS, pct, side="right")]
+        return totals, pct, grades
+
+    if 0 <= min(totals) and max(totals) <= MAX_TOTAL:
+        return totals, [PCT_BY_TOTAL[t] for t in totals], bytes(totals).translate(GRADE_TABLE).decode()
+
+    # Out of range marks: falling back to the per-row formula
+    pcts = [percent_of(t) for t in totals]
+    return totals, pcts, "".join(map(calculate_grade, pcts))
+
+class DuplicateCodeError(Exception):
+    pass
+
+class StudentRow:
+    # Light view over one row of the store that reads like the old record dicts
+    __slots__ = ("store", "slot")
+
+    def __init__(self, store, slot):
+        self.store = store
+        self.slot = slot
+
+    def __getitem__(self, key):
+        return self.store.value(self.slot, key)
+
+    def get(self, key, default=None):
+        try:
+            return self.store.value(self.slot, key)
+        except KeyError:
+            return default
+
+class StudentStore:
+    # Columnar record store: one typed array per mark column and interned names
+    # (codes are unique, so interning them would save nothing).
+    # Totals are one more column, filled in bulk on load; coursework, percent
+    # and grade are derived on demand instead of stored.
+    # Rows live in fixed slots; `index` maps code -> slot (in file order) and
+    # deleted slots are recycled, so add/update/delete never shift the columns.
+    # Listeners (sort caches etc.) get added(slot) / removing(slot) on each
+    # single-row edit and reset() after a bulk extend.
+    def __init__(self):
+        self.codes = []
+        self.names = []
+        self.marks = {col: array("h") for col in MARK_COLUMNS}
+        self.totals = array("h")
+        self.index = {}
+        self.free = []
+        self.listeners = []
+
+        self.getters = {
+            "code": self.codes.__getitem__,
+            "name": self.names.__getitem__,
+            "coursework": self.coursework,
+            "total": self.totals.__getitem__,
+            "percent": self.percent,
+            "grade": self.grade,
+        }
+        for col in MARK_COLUMNS:
+            self.getters[col] = self.marks[col].__getitem__
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return (StudentRow(self, slot) for slot in self.index.values())
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def slots(self):
+        return self.index.values()
+
+    def slot_of(self, code):
+        return self.index.get(code)
+
+    def row(self, slot):
+        return StudentRow(self, slot)
+
+    def find(self, code):
+        slot = self.index.get(code)
+        return None if slot is None else StudentRow(self, slot)
+
+    def value(self, slot, key):
+        return self.getters[key](slot)
+
+    # Derived columns
+    def coursework(self, slot):
+        m = self.marks
+        return m["cw1"][slot] + m["cw2"][slot] + m["cw3"][slot]
+
+    def total(self, slot):
+        return self.totals[slot]
+
+    def percent(self, slot):
+        total = self.totals[slot]
+        return PCT_BY_TOTAL[total] if 0 <= total <= MAX_TOTAL else percent_of(total)
+
+    def grade(self, slot):
+        total = self.totals[slot]
+        return GRADE_BY_TOTAL[total] if 0 <= total <= MAX_TOTAL else calculate_grade(percent_of(total))
+
+    # Editing
+    def append(self, code, name, c1, c2, c3, exam):
+        slot = self.put(code, name, c1, c2, c3, exam)
+        for listener in self.listeners:
+            listener.added(slot)
+        return slot
+
+    def put(self, code, name, c1, c2, c3, exam):
+        if code in self.index:
+            raise DuplicateCodeError(f"Student code {code} already exists.")
+
+        vals = (c1, c2, c3, exam)
+        if self.free:
+            slot = self.free.pop()
+            self.codes[slot] = code
+            self.names[slot] = sys.intern(name)
+            for col, val in zip(MARK_COLUMNS, vals):
+                self.marks[col][slot] = val
+            self.totals[slot] = sum(vals)
+        else:
+            slot = len(self.codes)
+            self.codes.append(code)
+            self.names.append(sys.intern(name))
+            for col, val in zip(MARK_COLUMNS, vals):
+                self.marks[col].append(val)
+            self.totals.append(sum(vals))
+
+        self.index[code] = slot
+        return slot
+
+    def extend(self, rows):
+        # Bulk append, one column at a time. Keeps the first of any repeated
+        # code and returns the skipped codes.
+        rows = list(rows)
+        skipped = []
+        if rows:
+            codes = [row[0] for row in rows]
+            if len(set(codes)) != len(codes) or not self.index.keys().isdisjoint(codes):
+                seen = set()
+                keep = []
+                for row in rows:
+                    if row[0] in self.index or row[0] in seen:
+                        skipped.append(row[0])
+                    else:
+                        seen.add(row[0])
+                        keep.append(row)
+                rows = keep
+        if rows:
+            self.extend_columns(*zip(*rows))
+
+        # Cheaper for listeners to rebuild once than to patch row by row
+        for listener in self.listeners:
+            listener.reset()
+        return skipped
+
+    def extend_columns(self, codes, names, cw1, cw2, cw3, exam, totals=None, shared_names=False):
+        # Appends already de-duplicated columns at the end of the store.
+        # shared_names: repeated names are already one object (no interning needed)
+        start = len(self.codes)
+        self.codes.extend(codes)
+        self.names.extend(names if shared_names else map(sys.intern, names))
+        for col, vals in zip(MARK_COLUMNS, (cw1, cw2, cw3, exam)):
+            self.marks[col].extend(vals)
+        self.totals.extend(total_column(cw1, cw2, cw3, exam) if totals is None else totals)
+        self.index.update(zip(self.codes[start:], range(start, len(self.codes))))
+
+    def regrade_all(self):
+        # Recomputes the total column for every slot in one batch
+        m = self.marks
+        self.totals[:] = array("h", total_column(m["cw1"], m["cw2"], m["cw3"], m["exam"]))
+        for listener in self.listeners:
+            listener.reset()
+
+    def set(self, slot, name, c1, c2, c3, exam):
+        for listener in self.listeners:
+            listener.removing(slot)
+
+        self.names[slot] = sys.intern(name)
+        for col, val in zip(MARK_COLUMNS, (c1, c2, c3, exam)):
+            self.marks[col][slot] = val
+        self.totals[slot] = c1 + c2 + c3 + exam
+
+        for listener in self.listeners:
+            listener.added(slot)
+
+    def delete(self, slot):
+        for listener in self.listeners:
+            listener.removing(slot)
+
+        del self.index[self.codes[slot]]
+        self.codes[slot] = None
+        self.names[slot] = None
+        self.free.append(slot)
+
+    def snapshot(self):
+        # Frozen copy for writing on another thread (list/array copies, no row objects)
+        return StoreSnapshot(self)
+
+    def ordered_columns(self):
+        # (codes, names, cw1, cw2, cw3, exam) in file order, without gaps
+        order = list(self.slots())
+        cols = [self.codes, self.names] + [self.marks[col] for col in MARK_COLUMNS]
+        if order == list(range(len(self.codes))):
+            return cols
+        return [[c[s] for s in order] if isinstance(c, list) else array("h", (c[s] for s in order))
+                for c in cols]
+
+    def iter_tuples(self):
+        # Raw (code, name, cw1, cw2, cw3, exam) rows in file order
+        codes, names = self.codes, self.names
+        c1, c2, c3, ex = (self.marks[col] for col in MARK_COLUMNS)
+        for slot in self.slots():
+            yield codes[slot], names[slot], c1[slot], c2[slot], c3[slot], ex[slot]
+
+class StoreSnapshot:
+    # Read-only copy of a store's columns, enough for MarksFile.write_all
+    def __init__(self, store):
+        self.order = list(store.index.values())
+        self.codes = list(store.codes)
+        self.names = list(store.names)
+        self.marks = {col: array("h", arr) for col, arr in store.marks.items()}
+
+    def __len__(self):
+        return len(self.order)
+
+    def slots(self):
+        return self.order
+
+    iter_tuples = StudentStore.iter_tuples
+    ordered_columns = StudentStore.ordered_columns
+
+class SortCache:
+    # One ascending permutation of slots per sort column, built on first use.
+    # Ties are broken by slot so every row has a unique position, which lets
+    # single-row edits be patched in with a binary search instead of a re-sort.
+    def __init__(self, store):
+        self.store = store
+        self.perms = {}
+        self.keys = {}
+        store.listeners.append(self)
+
+    def key_for(self, col):
+        if col not in self.keys:
+            getter = self.value_getter(col)
+            self.keys[col] = lambda slot: (getter(slot), slot)
+        return self.keys[col]
+
+    def value_getter(self, col):
+        # Percent only depends on the integer total, which is cheaper to read
+        return self.store.getters["total" if col == "percent" else col]
+
+    def order(self, col):
+        perm = self.perms.get(col)
+        if perm is None:
+            perm = self.perms[col] = self.build(col)
+        return perm
+
+    @perf.timed("sort.build")
+    def build(self, col):
+        self.key_for(col)
+        return self.sort_slots(col, self.store.slots())
+
+    def sort_slots(self, col, slots):
+        # Stable sort over slot order gives the same (value, slot) order
+        # as key_for() without building a tuple per row
+        perm = sorted(slots)
+        perm.sort(key=self.value_getter(col))
+        return perm
+
+    def added(self, slot):
+        for col, perm in self.perms.items():
+            bisect.insort(perm, slot, key=self.keys[col])
+
+    def removing(self, slot):
+        for col, perm in self.perms.items():
+            key = self.keys[col]
+            del perm[bisect.bisect_left(perm, key(slot), key=key)]
+
+    def reset(self):
+        self.perms.clear()
+
+class TotalStats:
+    # Class statistics from a count per distinct total. Totals are small
+    # integers, so the counts (with the distinct totals kept sorted) answer
+    # min, max, median and percentiles without touching the rows; percent
+    # sums are kept in exact hundredths. Subclasses fill the counts in
+    # rebuild(), which runs on the first query after `stale` is set.
+    def __init__(self):
+        self.stale = True
+
+    def refresh(self):
+        if self.stale:
+            self.stale = False
+            self.rebuild()
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def start(self, counts):
+        # Replaces everything with {total: students}
+        self.count = 0
+        self.pct_sum = 0
+        self.grades = dict.fromkeys("ABCDF", 0)
+        self.total_counts = dict(counts)
+        self.sorted_totals = sorted(self.total_counts)
+        for total, n in self.total_counts.items():
+            self.tally(total, n)
+
+    def tally(self, total, n):
+        # Adds (or with a negative n removes) n students holding `total`
+        if 0 <= total <= MAX_TOTAL:
+            pct, grade = PCT_BY_TOTAL[total], GRADE_BY_TOTAL[total]
+        else:
+            pct = percent_of(total)
+            grade = calculate_grade(pct)
+        self.count += n
+        self.pct_sum += round(pct * 100) * n
+        self.grades[grade] += n
+
+    # Queries
+    def average(self):
+        self.refresh()
+        return self.pct_sum / 100 / self.count if self.count else 0
+
+    def kth_total(self, k):
+        # k-th smallest total (0-based), walking the per-total counts
+        for total in self.sorted_totals:
+            k -= self.total_counts[total]
+            if k < 0:
+                return total
+        raise IndexError(k)
+
+    def median(self):
+        self.refresh()
+        if not self.count:
+            return 0
+        lo = percent_of(self.kth_total((self.count - 1) // 2))
+        hi = percent_of(self.kth_total(self.count // 2))
+        return (lo + hi) / 2
+
+    def percentile(self, p):
+        # Nearest-rank percentile of the percentage marks, p in 0..100
+        self.refresh()
+        if not self.count:
+            return 0
+        k = max(1, -(-self.count * p // 100))
+        return percent_of(self.kth_total(min(k, self.count) - 1))
+
+    def grade_counts(self):
+        self.refresh()
+        return dict(self.grades)
+
+class Aggregates(TotalStats):
+    # TotalStats over an in-memory store, kept in step with every edit
+    def __init__(self, store, sorter):
+        super().__init__()
+        self.store = store
+        self.sorter = sorter
+        store.listeners.append(self)
+
+    @perf.timed("stats.rebuild")
+    def rebuild(self):
+        # Counting the totals column in one pass, then tallying each
+        # distinct total (at most 161 of them) instead of every row
+        store = self.store
+        if len(store) == len(store.totals):
+            self.start(Counter(store.totals))  # No deleted slots: the column is the class
+        else:
+            self.start(Counter(map(store.totals.__getitem__, store.slots())))
+
+    def added(self, slot):
+        if self.stale:
+            return
+        total = self.store.total(slot)
+        self.tally(total, 1)
+        if total in self.total_counts:
+            self.total_counts[total] += 1
+        else:
+            self.total_counts[total] = 1
+            bisect.insort(self.sorted_totals, total)
+
+    def removing(self, slot):
+        if self.stale:
+            return
+        total = self.store.total(slot)
+        self.tally(total, -1)
+        self.total_counts[total] -= 1
+        if not self.total_counts[total]:
+            del self.total_counts[total]
+            del self.sorted_totals[bisect.bisect_left(self.sorted_totals, total)]
+
+    def reset(self):
+        self.stale = True
+
+    def extreme_slot(self, highest):
+        # First student (in slot order) holding the max or min total,
+        # found by binary search in the cached percent permutation
+        self.refresh()
+        if not self.count:
+            return None
+        total = self.sorted_totals[-1 if highest else 0]
+        perm = self.sorter.order("percent")
+        return perm[bisect.bisect_left(perm, (total, -1), key=self.sorter.key_for("percent"))]
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchIndex:
+    # Search box lookups: names containing the term, codes starting with it.
+    #  - lowercase names are computed once per row, not once per keystroke
+    #  - a trigram index over the distinct names narrows queries of 3+ chars
+    #  - typing more characters filters the previous matching names, not rows
+    #  - codes are found by binary search in the sort cache's code order, and
+    #    skipped when the term has a character no code contains
+    # The index is built on the first search and then kept in step with edits.
+    def __init__(self, store, sorter):
+        self.store = store
+        self.sorter = sorter
+        self.built = False
+        self.lower = []         # slot -> lowercase name
+        self.name_slots = {}    # lowercase name -> slots with that name
+        self.grams = {}         # trigram -> lowercase names containing it
+        self.code_chars = set() # every character used in any code (may hold stale ones)
+        self.last_term = None
+        self.last_names = None  # distinct names matching last_term
+        store.listeners.append(self)
+
+    @perf.timed("search.build")
+    def build(self):
+        self.lower = [None] * len(self.store.codes)
+        self.name_slots = {}
+        self.grams = {}
+        self.code_chars = set("".join(self.store.index))
+        self.last_term = self.last_names = None
+        for slot in self.store.slots():
+            self.index_slot(slot)
+        self.built = True
+
+    def index_slot(self, slot):
+        name = sys.intern(self.store.names[slot].lower())
+        self.lower[slot] = name
+        slots = self.name_slots.get(name)
+        if slots is None:
+            self.name_slots[name] = slots = set()
+            for g in trigrams(name):
+                self.grams.setdefault(g, set()).add(name)
+            if self.last_names is not None and self.last_term in name:
+                self.last_names.add(name)
+        slots.add(slot)
+
+    @perf.timed("search")
+    def search(self, term, codes=True):
+        # Returns the set of slots whose name contains `term` (or whose code starts with it)
+        if not self.built:
+            self.build()
+
+        hits = set()
+        for n in self.matching_names(term):
+            hits.update(self.name_slots.get(n, ()))
+        if codes and self.code_chars.issuperset(term):
+            hits.update(self.code_prefix(term))
+        return hits
+
+    def matching_names(self, term):
+        if self.last_names is not None and self.last_term in term:
+            # Narrowing: the new term can only match names the old one matched
+            names = {n for n in self.last_names if term in n}
+        elif len(term) < 3:
+            names = {n for n in self.name_slots if term in n}
+        else:
+            # Intersecting the trigram postings, smallest first, then verifying
+            postings = sorted((self.grams.get(g, ()) for g in trigrams(term)), key=len)
+            names = set(postings[0])
+            for p in postings[1:]:
+                names.intersection_update(p)
+                if not names:
+                    break
+            names = {n for n in names if term in n}
+        self.last_term, self.last_names = term, names
+        return names
+
+    def code_prefix(self, term):
+        # Slots whose code starts with `term`: one contiguous run of the code order
+        perm = self.sorter.order("code")
+        key = self.store.codes.__getitem__
+        lo = bisect.bisect_left(perm, term, key=key)
+        hi = bisect.bisect_left(perm, term + "\U0010ffff", lo, key=key)
+        return perm[lo:hi]
+
+    # Store listener hooks
+    def added(self, slot):
+        if not self.built:
+            return
+        if slot >= len(self.lower):
+            self.lower.extend([None] * (slot + 1 - len(self.lower)))
+        self.index_slot(slot)
+        self.code_chars.update(self.store.codes[slot])
+
+    def removing(self, slot):
+        if not self.built:
+            return
+        name = self.lower[slot]
+        slots = self.name_slots[name]
+        slots.discard(slot)
+        if not slots:
+            del self.name_slots[name]
+            for g in trigrams(name):
+                self.grams[g].discard(name)
+        self.lower[slot] = None
+
+    def reset(self):
+        self.built = False
+        self.last_term = self.last_names = None
+
+def decode_lines(data):
+    # Strict UTF-8, falling back to one line at a time so a stray byte (say a
+    # cp1252 "é") costs only its own line, which comes back as None
+    try:
+        return data.decode("utf-8").splitlines()
+    except UnicodeDecodeError:
+        lines = []
+        for raw in data.splitlines():
+            try:
+                lines.append(raw.decode("utf-8"))
+            except UnicodeDecodeError:
+                lines.append(None)
+        return lines
+
+def stream_lines(path, chunk_size=CHUNK_SIZE):
+    # Yields (lines, bytes_read) for every chunk, only one chunk is held at a time.
+    # Lines that are not valid UTF-8 are yielded as None for the caller to report.
+    with open(path, "rb") as f:
+        pending = b""
+        done = 0
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunk = pending + chunk
+            cut = chunk.rfind(b"\n") + 1  # Keeping the unfinished last line for the next chunk
+            pending = chunk[cut:]
+            if cut:
+                done += cut
+                yield decode_lines(chunk[:cut]), done
+
+        if pending:
+            yield decode_lines(pending), done + len(pending)
+
+# Valid mark ranges, rows outside them are reported instead of loaded
+MAX_CW = 20
+MAX_EXAM = 100
+
+UNDECODABLE = "not valid UTF-8 text (save the file as UTF-8)"
+
+class LoadReport:
+    # Everything the lenient parser had to skip, with line numbers and reasons.
+    # Only the first MAX_KEPT problems are kept, the rest are just counted.
+    MAX_KEPT = 1000
+
+    def __init__(self):
+        self.declared = None    # count from line 1 (None if missing or not a number)
+        self.data_lines = 0     # non-empty lines after the header
+        self.loaded = 0
+        self.problems = []      # (line number, reason, text)
+        self.problem_count = 0
+        self.duplicates = []
+
+    def bad(self, line_no, reason, text):
+        self.problem_count += 1
+        if len(self.problems) < self.MAX_KEPT:
+            self.problems.append((line_no, reason, text[:80]))
+
+    def count_mismatch(self):
+        return self.declared is not None and self.declared != self.data_lines
+
+    def clean(self):
+        return not (self.problem_count or self.duplicates or self.count_mismatch())
+
+    def summary(self, limit=10, save_note=True):
+        lines = [f"Loaded {self.loaded} students."]
+        if self.count_mismatch():
+            lines.append(f"Line 1 declares {self.declared} students but the file has {self.data_lines} data lines.")
+        if self.problem_count:
+            lines.append(f"{self.problem_count} bad lines were skipped:")
+            lines += [f"  line {n}: {reason}" for n, reason, _ in self.problems[:limit]]
+            if self.problem_count > limit:
+                lines.append(f"  ... and {self.problem_count - limit} more")
+        if self.duplicates:
+            lines.append(f"{len(self.duplicates)} rows reuse an earlier student code and were skipped "
+                         f"(e.g. {', '.join(self.duplicates[:5])}).")
+        if save_note and (self.problem_count or self.duplicates):
+            lines.append("Skipped rows are dropped from the file on the next save.")
+        return "\n".join(lines)
+
+def parse_row(parts):
+    # Returns the row tuple, or a reason string for a bad row
+    if len(parts) < 6:
+        return f"expected 6 fields, found {len(parts)}"
+    code = parts[0].strip()
+    name = parts[1].strip()
+    if not code or not name:
+        return "missing code or name"
+    try:
+        c1, c2, c3, exam = int(parts[2]), int(parts[3]), int(parts[4]), int(parts[5])
+    except ValueError:
+        return "marks must be whole numbers"
+    if not (0 <= c1 <= MAX_CW and 0 <= c2 <= MAX_CW and 0 <= c3 <= MAX_CW):
+        return f"coursework marks must be 0-{MAX_CW}"
+    if not 0 <= exam <= MAX_EXAM:
+        return f"exam mark must be 0-{MAX_EXAM}"
+    return (code, name, c1, c2, c3, exam)
+
+def iter_student_batches(path, chunk_size=CHUNK_SIZE, report=None):
+    # Parses rows chunk by chunk, yielding (good rows, bytes_read).
+    # Bad rows never stop the load, they are recorded in `report`.
+    if report is None:
+        report = LoadReport()
+    header_seen = False
+    line_no = 0
+    for lines, done in stream_lines(path, chunk_size):
+        batch = []
+        for line_no, line in enumerate(lines, line_no + 1):
+            if line is None:
+                if header_seen:
+                    report.data_lines += 1
+                header_seen = True
+                report.bad(line_no, UNDECODABLE, "")
+                continue
+            line = line.strip()
+            if not line:
+                continue
+
+            # First line is the student count
+            if not header_seen:
+                header_seen = True
+                try:
+                    report.declared = int(line)
+                except ValueError:
+                    report.bad(line_no, "first line should be the number of students", line)
+                continue
+
+            report.data_lines += 1
+            parts = line.split(",")
+            try:
+                # Happy path: no extra checks beyond the range test below
+                row = (parts[0].strip(), parts[1].strip(),
+                       int(parts[2]), int(parts[3]), int(parts[4]), int(parts[5]))
+                ok = (row[0] and row[1] and 0 <= row[2] <= MAX_CW and 0 <= row[3] <= MAX_CW
+                      and 0 <= row[4] <= MAX_CW and 0 <= row[5] <= MAX_EXAM)
+            except (ValueError, IndexError):
+                ok = False
+
+            if ok:
+                batch.append(row)
+            else:
+                report.bad(line_no, parse_row(parts), line)
+        report.loaded += len(batch)
+        perf.count("rows.parsed", len(batch))
+        yield batch, done
+
+def format_row(code, name, c1, c2, c3, exam):
+    return f"{code},{name},{c1},{c2},{c3},{exam}\n"
+
+# Binary snapshot layout: header, five little-endian int16 columns
+# (cw1, cw2, cw3, exam, total), one uint32 name id per row, then the codes
+# and the string table of distinct names, each as "\n"-joined UTF-8
+SNAP_MAGIC = b"SMSNAP01"
+SNAP_HEADER = struct.Struct("<8sqqqqqq")  # magic, src mtime_ns, src size, rows, distinct names, codes bytes, names bytes
+
+def little_endian(col):
+    if sys.byteorder == "big":
+        col.byteswap()
+    return col
+
+def write_snapshot(path, src_stat, store):
+    codes, names, *marks = store.ordered_columns()
+    totals = total_column(*marks)
+
+    table = {}
+    name_ids = array("I", (table.setdefault(n, len(table)) for n in names))
+    code_blob = "\n".join(codes).encode("utf-8")
+    name_blob = "\n".join(table).encode("utf-8")
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(SNAP_HEADER.pack(SNAP_MAGIC, src_stat.st_mtime_ns, src_stat.st_size,
+                                 len(codes), len(table), len(code_blob), len(name_blob)))
+        for col in (*marks, totals):
+            f.write(little_endian(array("h", col)).tobytes())
+        f.write(little_endian(name_ids).tobytes())
+        f.write(code_blob)
+        f.write(name_blob)
+    os.replace(tmp, path)
+
+@perf.timed("load.snapshot")
+def read_snapshot(path, src_stat, store):
+    # Memory-maps the snapshot and bulk-loads it into an empty store.
+    # Returns False (and loads nothing) when it is missing or out of date.
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return False
+
+    with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < SNAP_HEADER.size:
+            return False
+        magic, mtime_ns, size, rows, distinct, code_len, name_len = SNAP_HEADER.unpack_from(mm)
+        if (magic != SNAP_MAGIC or mtime_ns != src_stat.st_mtime_ns or size != src_stat.st_size
+                or len(mm) != SNAP_HEADER.size + rows * 14 + code_len + name_len):
+            return False
+
+        pos = SNAP_HEADER.size
+        cols = []
+        for typecode, width in ("h", 2), ("h", 2), ("h", 2), ("h", 2), ("h", 2), ("I", 4):
+            col = array(typecode)
+            col.frombytes(mm[pos:pos + rows * width])
+            cols.append(little_endian(col))
+            pos += rows * width
+        codes = mm[pos:pos + code_len].decode("utf-8").split("\n") if rows else []
+        pos += code_len
+        table = mm[pos:pos + name_len].decode("utf-8").split("\n") if distinct else []
+
+    *marks, name_ids = cols
+    names = list(map(table.__getitem__, name_ids))
+    store.extend_columns(codes, names, *marks, shared_names=True)
+    return True
+
+class MarksFile:
+    # The canonical `count + CSV` file plus an append-only change log next to it.
+    # Small edits only append one journal line; the journal is folded back into
+    # the main file (compaction) once it grows past a fraction of the file size.
+    # Files below JOURNAL_MIN_BYTES are cheap enough to rewrite on every edit.
+    JOURNAL_MIN_BYTES = 256 * 1024
+    COMPACT_RATIO = 8
+
+    def __init__(self, path, use_snapshot=True):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.tmp_path = path + ".tmp"
+
+        # Optional binary copy of the main file for fast startup, trusted only
+        # while the text file's mtime and size match the ones recorded in it
+        self.snap_path = path + ".snap" if use_snapshot else None
+
+    def journal_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except OSError:
+            return 0
+
+    def base_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    @perf.timed("save.rewrite")
+    def write_all(self, store):
+        # Atomic full rewrite: a crash leaves either the old or the new file, never half
+        with open(self.tmp_path, "w", encoding="utf-8") as f:
+            f.write(f"{len(store)}\n")
+            f.writelines(format_row(*row) for row in store.iter_tuples())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.tmp_path, self.path)
+        self.save_snapshot(store)
+
+        # The new file already contains every journaled edit
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def save_snapshot(self, store):
+        # Best effort: without a snapshot the next start just parses the text
+        if not self.snap_path:
+            return
+        try:
+            write_snapshot(self.snap_path, os.stat(self.path), store)
+        except OSError:
+            pass
+
+    def load_snapshot(self, store):
+        if not self.snap_path:
+            return False
+        try:
+            return read_snapshot(self.snap_path, os.stat(self.path), store)
+        except (OSError, ValueError, struct.error):
+            return False
+
+    def entry(self, op, code, store):
+        # One journal line; op is "+" (add), "~" (update) or "-" (delete)
+        if op == "-":
+            return f"-,{code}\n"
+        row = store.find(code)
+        return op + "," + format_row(code, row["name"], row["cw1"], row["cw2"], row["cw3"], row["exam"])
+
+    @perf.timed("save.journal")
+    def append_entries(self, lines):
+        with open(self.journal_path, "a+b") as f:
+            self.drop_torn_tail(f)
+            f.write("".join(lines).encode("utf-8"))
+
+    @staticmethod
+    def drop_torn_tail(f):
+        # A crash mid-append can leave the journal without its final newline;
+        # cutting back to the last complete line keeps the next entry from
+        # being glued onto the torn one
+        end = pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            start = max(0, pos - 4096)
+            f.seek(start)
+            block = f.read(pos - start)
+            if pos == end and block.endswith(b"\n"):
+                return
+            cut = block.rfind(b"\n")
+            if cut >= 0:
+                f.truncate(start + cut + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+    def log(self, op, code, store):
+        self.append_entries([self.entry(op, code, store)])
+
+    def needs_compaction(self, pending=0):
+        # `pending` is the size of journal lines not written yet
+        base = self.base_size()
+        if base < self.JOURNAL_MIN_BYTES:
+            return True
+        return (self.journal_size() + pending) * self.COMPACT_RATIO > base
+
+    def replay_journal(self, store, report=None):
+        # Re-applies logged edits on top of the main file. Replay is idempotent
+        # (adds upsert, deletes of missing codes are ignored) so a crash between
+        # compaction and journal removal is harmless. Malformed entries are
+        # skipped and recorded in `report` with their journal line number.
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        with open(self.journal_path, "r", encoding="utf-8", errors="surrogateescape") as f:
+            data = f.read()
+
+        applied = 0
+        # A missing final newline means a torn write, that last piece is dropped
+        for line_no, line in enumerate(data.split("\n")[:-1], 1):
+            op, _, rest = line.partition(",")
+            if op == "-" and rest:
+                slot = store.slot_of(rest)
+                if slot is not None:
+                    store.delete(slot)
+            elif op in ("+", "~"):
+                row = parse_row(rest.split(","))
+                if isinstance(row, str):
+                    if report is not None:
+                        report.bad(line_no, f"journal entry skipped, {row}", line)
+                    continue
+                code, name, *marks = row
+                slot = store.slot_of(code)
+                if slot is None:
+                    store.append(code, name, *marks)
+                else:
+                    store.set(slot, name, *marks)
+            else:
+                if report is not None:
+                    report.bad(line_no, "journal entry skipped, unknown change", line)
+                continue
+            applied += 1
+        return applied
+
+@perf.timed("load")
+def load_store(storage, store, progress=None):
+    # Reads the marks file and its journal into `store`, returns a LoadReport.
+    # Safe to run off the Tk thread: it touches nothing but the file and the store.
+    report = LoadReport()
+    if not os.path.exists(storage.path):
+        with open(storage.path, "w") as f:
+            f.write("0\n")
+        return report
+
+    if storage.load_snapshot(store):
+        report.loaded = report.data_lines = report.declared = len(store)
+    else:
+        size = os.path.getsize(storage.path) or 1
+        for batch, done in iter_student_batches(storage.path, report=report):
+            report.duplicates += store.extend(batch)
+            if progress:
+                progress(done / size)
+        report.loaded = len(store)
+
+        # The store holds exactly the text file at this point. A file with
+        # problems gets no snapshot, so the report shows again until it is fixed.
+        if report.clean():
+            storage.save_snapshot(store)
+
+    # Applying edits that were journaled but not yet compacted
+    storage.replay_journal(store, report)
+    return report
+
+def find_shards(pattern):
+    # A directory means every *.txt marks file in it, anything else is a glob
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.txt")
+    return sorted(glob.glob(pattern))
+
+def parse_shard(path):
+    # Worker for import_shards: parses and grades one marks file in a child
+    # process. Returns plain columns (cheap to pickle) rather than a store;
+    # names are interned so pickle sends each distinct name only once.
+    report = LoadReport()
+    codes, names = [], []
+    cw1, cw2, cw3, exam = (array("h") for _ in MARK_COLUMNS)
+    for batch, _ in iter_student_batches(path, report=report):
+        for code, name, c1, c2, c3, ex in batch:
+            codes.append(code)
+            names.append(sys.intern(name))
+            cw1.append(c1)
+            cw2.append(c2)
+            cw3.append(c3)
+            exam.append(ex)
+    totals = array("h", total_column(cw1, cw2, cw3, exam))
+    return path, (codes, names, cw1, cw2, cw3, exam), totals, report
+
+class ShardReport:
+    # Per-shard LoadReports plus the codes that appear in more than one shard.
+    # The first shard (in sorted path order) keeps a repeated code.
+    def __init__(self):
+        self.shards = []        # (path, LoadReport)
+        self.collisions = []    # (code, kept from, skipped in)
+
+    @property
+    def loaded(self):
+        return sum(r.loaded for _, r in self.shards)
+
+    def clean(self):
+        return not self.collisions and all(r.clean() for _, r in self.shards)
+
+    def summary(self, limit=10):
+        lines = [f"Loaded {self.loaded} students from {len(self.shards)} files."]
+        for path, r in self.shards:
+            if not r.clean():
+                lines.append(f"{os.path.basename(path)}:")
+                lines += ["  " + line for line in r.summary(limit, save_note=False).splitlines()[1:]]
+        if self.collisions:
+            lines.append(f"{len(self.collisions)} codes appear in more than one file, the first file wins:")
+            lines += [f"  {code}: kept from {os.path.basename(kept)}, skipped in {os.path.basename(skipped)}"
+                      for code, kept, skipped in self.collisions[:limit]]
+            if len(self.collisions) > limit:
+                lines.append(f"  ... and {len(self.collisions) - limit} more")
+        return "\n".join(lines)
+
+def select_rows(cols, keep):
+    # The rows at positions `keep` from parallel list / array("h") columns
+    return [[c[i] for i in keep] if isinstance(c, list) else array("h", (c[i] for i in keep)) for c in cols]
+
+def merge_shard(store, cols, totals, path, report, starts, owners):
+    # Appends one parsed shard, dropping codes the store already holds, and
+    # returns how many rows it kept.
+    # starts/owners map slot ranges back to the shard that filled them.
+    codes = cols[0]
+    taken = store.index
+    unique = len(set(codes)) == len(codes)
+    if not unique or not taken.keys().isdisjoint(codes):
+        seen = set()
+        keep = []
+        for i, code in enumerate(codes):
+            slot = taken.get(code)
+            if slot is not None:
+                owner = owners[bisect.bisect_right(starts, slot) - 1]
+                report.collisions.append((code, owner, path))
+            elif code in seen:
+                report.shards[-1][1].duplicates.append(code)
+            else:
+                seen.add(code)
+                keep.append(i)
+        cols = select_rows(cols, keep)
+        totals = array("h", (totals[i] for i in keep))
+
+    starts.append(len(store.codes))
+    owners.append(path)
+    store.extend_columns(*cols, totals=totals)
+    return len(totals)
+
+def import_shards(paths, store, workers=None):
+    # Parses and grades many marks files on a process pool (workers=1 runs
+    # in this process), then merges them into `store` in path order.
+    # Returns a ShardReport.
+    report = ShardReport()
+    starts, owners = [], []
+
+    def merge_all(results):
+        for path, cols, totals, shard_report in results:
+            report.shards.append((path, shard_report))
+            shard_report.loaded = merge_shard(store, cols, totals, path, report, starts, owners)
+
+    if workers == 1 or len(paths) < 2:
+        merge_all(map(parse_shard, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            merge_all(pool.map(parse_shard, paths))
+
+    for listener in store.listeners:
+        listener.reset()
+    return report
+
+def locate_marks_file(filename=DEFAULT_FILENAME):
+    # Looks in the working directory, next to this file and in resources/
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    candidates = [
+        filename,
+        os.path.join(current_dir, filename),
+        f"resources/{filename}",
+        os.path.join(current_dir, "resources", filename)
+    ]
+
+    for path in candidates:
+        if os.path.exists(path):
+            return os.path.abspath(path)
+    
+    return filename
+
+class InvalidRecordError(ValueError):
+    pass
+
+def check_record(code, name, c1, c2, c3, exam):
+    # Same rules the loader applies to rows in the file
+    if not code or not name:
+        raise InvalidRecordError("Student code and name are required.")
+    if "," in code or "," in name:
+        raise InvalidRecordError("Code and name cannot contain commas.")
+    if not (0 <= c1 <= MAX_CW and 0 <= c2 <= MAX_CW and 0 <= c3 <= MAX_CW):
+        raise InvalidRecordError(f"Coursework marks must be between 0 and {MAX_CW}.")
+    if not 0 <= exam <= MAX_EXAM:
+        raise InvalidRecordError(f"Exam mark must be between 0 and {MAX_EXAM}.")
+
+class StoreView:
+    # Sorted / filtered rows of a StudentStore, read a page at a time.
+    # Backends return views from view(); the SQLite one pages with LIMIT.
+    def __init__(self, store, slots):
+        self.store = store
+        self.slots = slots
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __iter__(self):
+        return map(self.store.row, self.slots)
+
+    @perf.timed("view.page")
+    def page(self, start, count):
+        return [self.store.row(slot) for slot in self.slots[start:start + count]]
+
+    def detached(self):
+        # Export tuples (code, name, cw1, cw2, cw3, exam, coursework, total,
+        # percent, grade) from a frozen copy, safe to read on another thread
+        return export_tuples(self.store.snapshot(), list(self.slots))
+
+def export_tuples(snap, slots):
+    codes, names = snap.codes, snap.names
+    c1, c2, c3, ex = (snap.marks[col] for col in MARK_COLUMNS)
+    for slot in slots:
+        cw = c1[slot] + c2[slot] + c3[slot]
+        total = cw + ex[slot]
+        yield (codes[slot], names[slot], c1[slot], c2[slot], c3[slot], ex[slot], cw, total,
+               PCT_BY_TOTAL[total], GRADE_BY_TOTAL[total])
+
+class SaveJob:
+    # One queued write, run on whichever thread the caller likes. If it fails,
+    # save_failed(job) puts its journal lines back so the next save retries them.
+    def __init__(self, fn, args, lines=()):
+        self.fn = fn
+        self.args = args
+        self.lines = lines
+
+    def run(self):
+        return self.fn(*self.args)
+
+def open_database(path, use_snapshot=True):
+    # Picks the storage backend from the file name: *.sqlite / *.db files use
+    # SQLite, anything else is the count + CSV text format
+    if os.path.splitext(path)[1].lower() in (".sqlite", ".db"):
+        from student_sqlite import SqliteDatabase
+        return SqliteDatabase(path)
+    return StudentDatabase(path, use_snapshot)
+
+class StudentDatabase:
+    # The UI-free engine over the text marks file: the record store and its
+    # indexes live in memory, edits queue journal lines in `pending`.
+    #
+    # Storage backends (this one and student_sqlite.SqliteDatabase) share these
+    # methods, which are all the GUI and the CLI use:
+    #   prepare_load(progress) / finish_load(state)  - loading, first half thread-safe
+    #   load()
+    #   add / update / delete, get(code)
+    #   has_pending(), save_job(), save_failed(job), flush(), close()
+    #   view(sort_col, desc, term) -> view with len(), page(), iteration
+    #       and detached() (export tuples safe to read on another thread)
+    #   find, highest, lowest, top, summary
+    #   prepare_import(batches, report) / finish_import(state, report)
+    #   import_batches(batches, report), iter_columns(), import_marks(path),
+    #   export_marks(path)
+    # `batches` are (rows, bytes_read) pairs as from iter_student_batches.
+    # flush_before_read is True when imports and exports only see saved edits.
+    flush_before_read = False
+
+    def __init__(self, path, use_snapshot=True):
+        self.storage = MarksFile(path, use_snapshot)
+        self.pending = []
+        self.rewrite = False    # True after a bulk import: the next save rewrites the file
+        self.use_store(StudentStore())
+
+    @property
+    def path(self):
+        return self.storage.path
+
+    def use_store(self, store):
+        # Attaching the sort, search and statistics indexes to a store
+        self.records = store
+        self.sorter = SortCache(store)
+        self.finder = SearchIndex(store, self.sorter)
+        self.stats = Aggregates(store, self.sorter)
+
+    # Loading
+    def prepare_load(self, progress=None):
+        # Reads the file into a new store without touching this one, so it
+        # can run on a worker thread; returns (store, LoadReport)
+        store = StudentStore()
+        return store, load_store(self.storage, store, progress)
+
+    def finish_load(self, store):
+        self.use_store(store)
+
+    def load(self, progress=None):
+        store, report = self.prepare_load(progress)
+        self.finish_load(store)
+        return report
+
+    def load_shards(self, paths, workers=None):
+        # (Text backend only) merged view of many marks files; `storage` still names the file a
+        # save would write, the shards themselves are never modified
+        store = StudentStore()
+        report = import_shards(paths, store, workers)
+        self.use_store(store)
+        return report
+
+    # Editing
+    def add(self, code, name, c1, c2, c3, exam):
+        check_record(code, name, c1, c2, c3, exam)
+        self.records.append(code, name, c1, c2, c3, exam)
+        self.pending.append(self.storage.entry("+", code, self.records))
+
+    def update(self, code, name, c1, c2, c3, exam):
+        slot = self.records.slot_of(code)
+        if slot is None:
+            raise KeyError(code)
+        check_record(code, name, c1, c2, c3, exam)
+        self.records.set(slot, name, c1, c2, c3, exam)
+        self.pending.append(self.storage.entry("~", code, self.records))
+
+    def delete(self, code):
+        slot = self.records.slot_of(code)
+        if slot is None:
+            raise KeyError(code)
+        self.records.delete(slot)
+        self.pending.append(self.storage.entry("-", code, self.records))
+
+    def get(self, code):
+        return self.records.find(code)
+
+    # Saving
+    def has_pending(self):
+        return bool(self.pending) or self.rewrite
+
+    def take_pending(self):
+        lines, self.pending = self.pending, []
+        return lines
+
+    def save_job(self):
+        # The queued edits as one write: appended to the journal, or a
+        # compaction of a frozen copy of the store. None if nothing is queued.
+        lines = self.take_pending()
+        if not (lines or self.rewrite):
+            return None
+        if self.rewrite or self.storage.needs_compaction(sum(map(len, lines))):
+            self.rewrite = False
+            return SaveJob(self.storage.write_all, (self.records.snapshot(),), lines)
+        return SaveJob(self.storage.append_entries, (lines,), lines)
+
+    def save_failed(self, job):
+        if job.fn == self.storage.write_all:
+            self.rewrite = True  # A full rewrite covers the lost lines too
+        else:
+            self.pending[:0] = job.lines
+
+    def flush(self):
+        # Writing queued edits now, on the calling thread
+        job = self.save_job()
+        if job is not None:
+            job.run()
+
+    def close(self):
+        # Leaving the canonical file fully up to date for other tools
+        self.flush()
+        if self.storage.journal_size():
+            self.storage.write_all(self.records)
+
+    # Queries
+    @perf.timed("view")
+    def view(self, sort_col="percent", desc=True, term=""):
+        # Rows in display order, optionally filtered by a (lowercase) search term
+        order = self.sorter.order(sort_col)
+        if term:
+            hits = self.finder.search(term)
+            if len(hits) * 2 < len(order):
+                # Sorting the hits beats walking the whole permutation (cache misses
+                # on every slot) until about half the class matches
+                order = self.sorter.sort_slots(sort_col, hits)
+            else:
+                order = list(filter(hits.__contains__, order))
+        return StoreView(self.records, order[::-1] if desc else order)
+
+    def find(self, query):
+        # Exact code hits the code index, otherwise the first name match
+        found = self.records.find(query.strip())
+        if not found:
+            hits = self.finder.search(query.lower(), codes=False)
+            if hits:
+                found = self.records.row(min(hits))
+        return found
+
+    def highest(self):
+        slot = self.stats.extreme_slot(highest=True)
+        return None if slot is None else self.records.row(slot)
+
+    def lowest(self):
+        slot = self.stats.extreme_slot(highest=False)
+        return None if slot is None else self.records.row(slot)
+
+    def top(self, n, lowest=False):
+        order = self.sorter.order("percent")
+        slots = order[:n] if lowest else order[:-n - 1:-1] if n else []
+        return [self.records.row(slot) for slot in slots]
+
+    def summary(self):
+        return {
+            "count": len(self.records),
+            "average": self.stats.average(),
+            "median": self.stats.median(),
+            "p25": self.stats.percentile(25),
+            "p75": self.stats.percentile(75),
+            "grades": self.stats.grade_counts(),
+        }
+
+    # Bulk access
+    def iter_columns(self):
+        # (codes, names, cw1, cw2, cw3, exam) blocks in file order
+        yield self.records.ordered_columns()
+
+    @perf.timed("import")
+    def prepare_import(self, batches, report):
+        # Parses into a staging store, so it can run on a worker thread
+        staging = StudentStore()
+        for batch, _ in batches:
+            report.duplicates += staging.extend(batch)
+        return staging
+
+    def finish_import(self, staging, report):
+        # Appends the staged rows in one go, keeping codes already present;
+        # the next save rewrites the file once
+        cols = staging.ordered_columns()
+        taken = self.records.index
+        if not taken.keys().isdisjoint(cols[0]):
+            report.duplicates += [code for code in cols[0] if code in taken]
+            cols = select_rows(cols, [i for i, code in enumerate(cols[0]) if code not in taken])
+        self.records.extend_columns(*cols, shared_names=True)
+        for listener in self.records.listeners:
+            listener.reset()
+        report.loaded -= len(report.duplicates)
+        self.rewrite = True
+
+    def import_batches(self, batches, report):
+        self.finish_import(self.prepare_import(batches, report), report)
+        self.flush()
+        return report
+
+    def import_marks(self, path):
+        # Adds every student from a text marks file, keeping existing codes;
+        # returns the LoadReport
+        report = LoadReport()
+        return self.import_batches(iter_student_batches(path, report=report), report)
+
+    def export_marks(self, path):
+        MarksFile(path).write_all(self.records)
+
+def read_corrections(path):
+    # Moderation corrections, one per line: "code,cw1,cw2,cw3,exam" keeps the
+    # name, "code,name,cw1,cw2,cw3,exam" replaces it too. Blank lines and
+    # lines starting with # are ignored. Yields (line number, code, name or
+    # None, cw1, cw2, cw3, exam).
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = [p.strip() for p in line.split(",")]
+            if len(parts) not in (5, 6):
+                raise InvalidRecordError(f"Line {line_no}: expected 5 or 6 fields, found {len(parts)}.")
+            name = parts.pop(1) if len(parts) == 6 else None
+            try:
+                marks = [int(p) for p in parts[1:]]
+            except ValueError:
+                raise InvalidRecordError(f"Line {line_no}: marks must be whole numbers.")
+            yield (line_no, parts[0], name, *marks)
+
+class EditHistory:
+    # Undo/redo and batched edits on top of either database backend.
+    # Changes are kept as compact deltas, code -> (before, after), where a
+    # state is (name, cw1, cw2, cw3, exam) or None for "no such student";
+    # nothing else about the class is copied. Edits made inside batch() are
+    # one undo step, and all of them are reverted if any one fails.
+    MAX_STEPS = 100
+
+    def __init__(self, db):
+        self.db = db
+        self.undo_steps = []
+        self.redo_steps = []
+        self.open = None    # deltas of the batch being built
+
+    def state(self, code):
+        row = self.db.get(code)
+        return None if row is None else (row["name"], row["cw1"], row["cw2"], row["cw3"], row["exam"])
+
+    def move(self, code, current, target):
+        # Takes one student from state `current` to state `target`
+        if target is None:
+            self.db.delete(code)
+        elif current is None:
+            self.db.add(code, *target)
+        else:
+            self.db.update(code, *target)
+
+    def record(self, code, before, after):
+        deltas = {} if self.open is None else self.open
+        if code in deltas:
+            before = deltas[code][0]  # Several edits to one student collapse into one delta
+        deltas[code] = (before, after)
+        if self.open is None:
+            self.push(deltas)
+
+    def push(self, deltas):
+        deltas = {code: d for code, d in deltas.items() if d[0] != d[1]}
+        if not deltas:
+            return
+        self.undo_steps.append(deltas)
+        if len(self.undo_steps) > self.MAX_STEPS:
+            del self.undo_steps[0]
+        self.redo_steps.clear()
+
+    # Editing (same arguments as the database methods)
+    def add(self, code, name, c1, c2, c3, exam):
+        self.db.add(code, name, c1, c2, c3, exam)
+        self.record(code, None, (name, c1, c2, c3, exam))
+
+    def update(self, code, name, c1, c2, c3, exam):
+        before = self.state(code)
+        self.db.update(code, name, c1, c2, c3, exam)
+        self.record(code, before, (name, c1, c2, c3, exam))
+
+    def delete(self, code):
+        before = self.state(code)
+        self.db.delete(code)
+        self.record(code, before, None)
+
+    @contextmanager
+    def batch(self):
+        # A nested batch just joins the outer one
+        if self.open is not None:
+            yield
+            return
+        self.open = {}
+        try:
+            yield
+        except BaseException:
+            deltas, self.open = self.open, None
+            for code, (before, after) in deltas.items():
+                self.move(code, after, before)
+            raise
+        deltas, self.open = self.open, None
+        self.push(deltas)
+
+    def apply_corrections(self, path):
+        # One batch for a whole corrections file; returns how many students changed
+        with self.batch():
+            for line_no, code, name, c1, c2, c3, exam in read_corrections(path):
+                current = self.state(code)
+                if current is None:
+                    raise InvalidRecordError(f"Line {line_no}: no student with code {code}.")
+                self.update(code, name or current[0], c1, c2, c3, exam)
+            return len(self.open)
+
+    def clear(self):
+        # The class was replaced or merged behind the recorded steps (load, import)
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+
+    def replay(self, deltas, backwards):
+        # Moves every student in one step, all or nothing: if a move fails
+        # (the class changed under the step), the moves already made are reverted
+        done = []
+        try:
+            for code, (before, after) in deltas.items():
+                current, target = (after, before) if backwards else (before, after)
+                self.move(code, current, target)
+                done.append((code, current, target))
+        except BaseException:
+            for code, current, target in reversed(done):
+                self.move(code, target, current)
+            raise
+
+    # Undo / redo, each returns the codes it touched (empty if nothing to do).
+    # A step that fails stays where it was and the class is left unchanged.
+    def undo(self):
+        if not self.undo_steps:
+            return []
+        deltas = self.undo_steps[-1]
+        self.replay(deltas, backwards=True)
+        self.redo_steps.append(self.undo_steps.pop())
+        return list(deltas)
+
+    def redo(self):
+        if not self.redo_steps:
+            return []
+        deltas = self.redo_steps[-1]
+        self.replay(deltas, backwards=False)
+        self.undo_steps.append(self.redo_steps.pop())
+        return list(deltas)
@@ -0,0 +1,136 @@
+# CSV / TSV interchange for the Student Manager engine.
+# Import maps spreadsheet columns onto (code, name, cw1, cw2, cw3, exam) and
+# yields validated batches, export writes any view's rows with the derived
+# columns. Both stream: only one batch of rows is in memory at a time.
+import csv
+import os
+
+import student_perf as perf
+from student_core import CHUNK_SIZE, UNDECODABLE, LoadReport, InvalidRecordError, parse_row, stream_lines
+
+FIELDS = ("code", "name", "cw1", "cw2", "cw3", "exam")
+EXPORT_HEADER = FIELDS + ("coursework", "total", "percent", "grade")
+
+# Header names recognised without an explicit mapping (compared lowercased)
+FIELD_ALIASES = {
+    "code": ("code", "student code", "student_code", "id", "student id", "student_id", "number"),
+    "name": ("name", "full name", "full_name", "student", "student name", "student_name"),
+    "cw1": ("cw1", "coursework 1", "coursework1", "cw 1"),
+    "cw2": ("cw2", "coursework 2", "coursework2", "cw 2"),
+    "cw3": ("cw3", "coursework 3", "coursework3", "cw 3"),
+    "exam": ("exam", "exam mark", "exam_mark", "final"),
+}
+
+BATCH_ROWS = 50_000
+
+def delimiter_for(path):
+    # Tab for .tsv / .tab files, comma for everything else
+    return "\t" if os.path.splitext(path)[1].lower() in (".tsv", ".tab") else ","
+
+def parse_mapping(text):
+    # "code=ID, name=Student, exam=3" -> {"code": "ID", "name": "Student", "exam": 3}
+    # (a number picks a column by position, counting from 0)
+    mapping = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        field, sep, column = part.partition("=")
+        field, column = field.strip().lower(), column.strip()
+        if not sep or field not in FIELDS or not column:
+            raise InvalidRecordError(f"Bad column mapping '{part}', expected field=column "
+                                     f"with field one of {', '.join(FIELDS)}.")
+        mapping[field] = int(column) if column.isdigit() else column
+    return mapping
+
+def map_columns(header, mapping=None):
+    # Column position for each of FIELDS: explicit mapping first, then aliases
+    lowered = [h.strip().lower() for h in header]
+    positions = []
+    for field in FIELDS:
+        wanted = (mapping or {}).get(field)
+        if isinstance(wanted, int):
+            pos = wanted if wanted < len(header) else None
+        elif wanted is not None:
+            pos = lowered.index(wanted.lower()) if wanted.lower() in lowered else None
+        else:
+            pos = next((lowered.index(a) for a in FIELD_ALIASES[field] if a in lowered), None)
+        if pos is None:
+            raise InvalidRecordError(f"No column for '{field}' in the header: {', '.join(header)}.")
+        positions.append(pos)
+    return positions
+
+def iter_csv_batches(path, mapping=None, report=None, delimiter=None, progress=None):
+    # Parses a CSV/TSV file with a header row into batches of valid rows,
+    # yielding (rows, bytes_read) like iter_student_batches. Bad rows are
+    # recorded in `report` and skipped.
+    if report is None:
+        report = LoadReport()
+    size = os.path.getsize(path) or 1
+    done = 0
+
+    def lines():
+        # Undecodable lines are reported here and read as blank lines
+        nonlocal done
+        line_no = 0
+        for chunk, done in stream_lines(path, CHUNK_SIZE):
+            for line_no, line in enumerate(chunk, line_no + 1):
+                if line is None:
+                    report.bad(line_no, UNDECODABLE, "")
+                    line = ""
+                yield line
+
+    reader = csv.reader(lines(), delimiter=delimiter or delimiter_for(path))
+    header = next(reader, None)
+    if header is None:
+        return
+    if header and header[0].startswith("\ufeff"):
+        header[0] = header[0][1:]  # Excel's UTF-8 byte order mark
+    positions = map_columns(header, mapping)
+    width = max(positions) + 1
+
+    batch = []
+    for fields in reader:
+        if not any(fields):
+            continue
+        report.data_lines += 1
+        row = parse_row([fields[p] for p in positions]) if len(fields) >= width else \
+            f"expected at least {width} fields, found {len(fields)}"
+        if isinstance(row, tuple):
+            batch.append(row)
+        else:
+            report.bad(reader.line_num, row, ",".join(fields))
+        if len(batch) >= BATCH_ROWS:
+            report.loaded += len(batch)
+            perf.count("rows.parsed", len(batch))
+            yield batch, done
+            batch = []
+            if progress:
+                progress(done / size)
+    report.loaded += len(batch)
+    perf.count("rows.parsed", len(batch))
+    yield batch, done
+
+def write_stream(f, rows, delimiter=",", progress=None, total=None):
+    # Streams export rows (code, name, cw1, cw2, cw3, exam, coursework, total,
+    # percent, grade) to an open file; returns the row count
+    writer = csv.writer(f, delimiter=delimiter)
+    writer.writerow(EXPORT_HEADER)
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row[:8] + (f"{row[8]:.2f}", row[9]))
+        if len(batch) >= BATCH_ROWS:
+            writer.writerows(batch)
+            count += len(batch)
+            batch = []
+            if progress and total:
+                progress(count / total)
+    writer.writerows(batch)
+    return count + len(batch)
+
+@perf.timed("export")
+def write_rows(rows, path, delimiter=None, progress=None, total=None):
+    # Atomic export to a CSV/TSV file (tab for .tsv)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        count = write_stream(f, rows, delimiter or delimiter_for(path), progress, total)
+    os.replace(tmp_path, path)
+    return count
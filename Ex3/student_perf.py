@@ -0,0 +1,74 @@
+# Timers and counters for the Student Manager hot paths.
+# Off by default. Turn it on with STUDENT_PERF=1 (and STUDENT_PERF_PROFILE=out.prof
+# for a cProfile dump), or with --perf / --profile FILE on Ex3.py and student_cli.py.
+# When on, a per-operation latency table is printed to stderr at exit.
+# When off, a timed function costs one extra call and a flag check.
+import atexit
+import cProfile
+import functools
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+ENABLED = False
+samples = defaultdict(list)     # operation -> durations in seconds
+counters = Counter()
+profiler = None
+profile_path = None
+
+def timed(name):
+    # Decorator: records how long each call takes under `name` (not for generators)
+    def wrap(fn):
+        @functools.wraps(fn)
+        def timed_fn(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                samples[name].append(time.perf_counter() - start)
+        return timed_fn
+    return wrap
+
+def count(name, n=1):
+    if ENABLED:
+        counters[name] += n
+
+def enable(profile=None):
+    # Starts collecting; `profile` is a path for cProfile stats (main thread only)
+    global ENABLED, profiler, profile_path
+    if not ENABLED:
+        ENABLED = True
+        atexit.register(report)
+    if profile and profiler is None:
+        profile_path = profile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+def percentile(sorted_vals, p):
+    # Nearest-rank percentile of an ascending list
+    k = max(1, -(-len(sorted_vals) * p // 100))
+    return sorted_vals[min(k, len(sorted_vals)) - 1]
+
+def summary():
+    lines = [f"{'operation':<22} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'total s':>9}"]
+    for name in sorted(samples):
+        vals = sorted(samples[name])
+        lines.append(f"{name:<22} {len(vals):>7} {percentile(vals, 50) * 1e3:>9.2f} "
+                     f"{percentile(vals, 95) * 1e3:>9.2f} {vals[-1] * 1e3:>9.2f} {sum(vals):>9.3f}")
+    for name in sorted(counters):
+        lines.append(f"{name:<22} {counters[name]:>7}")
+    return "\n".join(lines)
+
+def report():
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+        print(f"cProfile stats written to {profile_path}", file=sys.stderr)
+    if samples or counters:
+        print(summary(), file=sys.stderr)
+
+if os.environ.get("STUDENT_PERF", "") not in ("", "0"):
+    enable(os.environ.get("STUDENT_PERF_PROFILE") or None)
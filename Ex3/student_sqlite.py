@@ -0,0 +1,367 @@
+# SQLite storage backend for the Student Manager engine.
+# Same methods as student_core.StudentDatabase, but the rows stay on disk:
+# sorting, filtering, top/bottom and paging run as indexed SQL queries, so a
+# cohort does not have to fit in memory. Class statistics come from a small
+# per-total histogram table that triggers keep up to date.
+import os
+import sqlite3
+from array import array
+
+import student_perf as perf
+
+from student_core import (DuplicateCodeError, LoadReport, PCT_BY_TOTAL, GRADE_BY_TOTAL, TotalStats,
+                          calculate_grade, check_record, format_row, iter_student_batches, percent_of)
+
+TABLES = """
+CREATE TABLE IF NOT EXISTS students (
+    code    TEXT NOT NULL UNIQUE,
+    name    TEXT NOT NULL,
+    cw1     INTEGER NOT NULL,
+    cw2     INTEGER NOT NULL,
+    cw3     INTEGER NOT NULL,
+    exam    INTEGER NOT NULL,
+    total   INTEGER NOT NULL,
+    percent REAL NOT NULL,
+    grade   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS total_counts (
+    total INTEGER PRIMARY KEY,
+    n     INTEGER NOT NULL
+);
+"""
+
+# The code index comes with UNIQUE; these two serve name and percent sorting
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS students_name ON students(name)",
+    "CREATE INDEX IF NOT EXISTS students_percent ON students(percent)",
+)
+
+ADDED_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS students_added AFTER INSERT ON students BEGIN
+    INSERT INTO total_counts (total, n) VALUES (new.total, 1)
+        ON CONFLICT (total) DO UPDATE SET n = n + 1;
+END"""
+
+TRIGGERS = ADDED_TRIGGER + """;
+CREATE TRIGGER IF NOT EXISTS students_removed AFTER DELETE ON students BEGIN
+    UPDATE total_counts SET n = n - 1 WHERE total = old.total;
+END;
+CREATE TRIGGER IF NOT EXISTS students_changed AFTER UPDATE OF total ON students BEGIN
+    UPDATE total_counts SET n = n - 1 WHERE total = old.total;
+    INSERT INTO total_counts (total, n) VALUES (new.total, 1)
+        ON CONFLICT (total) DO UPDATE SET n = n + 1;
+END;
+"""
+
+ROW_COLUMNS = "code, name, cw1, cw2, cw3, exam, cw1 + cw2 + cw3 AS coursework, total, percent, grade"
+
+# Sort keys the GUI and CLI use, mapped to SQL (never interpolate user text)
+ORDER_BY = {
+    "code": "code",
+    "name": "name",
+    "cw1": "cw1", "cw2": "cw2", "cw3": "cw3",
+    "coursework": "cw1 + cw2 + cw3",
+    "exam": "exam",
+    "total": "percent",     # percent only depends on the total, and is indexed
+    "percent": "percent",
+    "grade": "grade",
+}
+
+# Rows per executemany / fetchmany round trip
+BATCH_ROWS = 50_000
+
+def derived(c1, c2, c3, exam):
+    total = c1 + c2 + c3 + exam
+    if 0 <= total < len(PCT_BY_TOTAL):
+        return total, PCT_BY_TOTAL[total], GRADE_BY_TOTAL[total]
+    pct = percent_of(total)
+    return total, pct, calculate_grade(pct)
+
+def db_row(code, name, c1, c2, c3, exam):
+    return (code, name, c1, c2, c3, exam, *derived(c1, c2, c3, exam))
+
+INSERT_SQL = ("INSERT INTO students (code, name, cw1, cw2, cw3, exam, total, percent, grade) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+INSERT_OR_IGNORE_SQL = INSERT_SQL.replace("INSERT", "INSERT OR IGNORE", 1)
+
+class HistogramStats(TotalStats):
+    # TotalStats over the total_counts table instead of a store
+    def __init__(self, conn):
+        super().__init__()
+        self.conn = conn
+
+    @perf.timed("stats.rebuild")
+    def rebuild(self):
+        self.start(self.conn.execute("SELECT total, n FROM total_counts WHERE n > 0"))
+
+class SqlView:
+    # One sorted / filtered query, read a page at a time with LIMIT/OFFSET
+    def __init__(self, db, where, params, order):
+        self.db = db
+        self.where = where
+        self.params = params
+        self.order = order
+        self.count = None
+
+    @perf.timed("view.count")
+    def __len__(self):
+        if self.count is None:
+            if self.where:
+                sql = f"SELECT COUNT(*) FROM students WHERE {self.where}"
+                self.count = self.db.conn.execute(sql, self.params).fetchone()[0]
+            else:
+                self.db.stats.refresh()
+                self.count = self.db.stats.count
+        return self.count
+
+    def query(self, tail=""):
+        where = f" WHERE {self.where}" if self.where else ""
+        return f"SELECT {ROW_COLUMNS} FROM students{where} ORDER BY {self.order}{tail}"
+
+    def __iter__(self):
+        return iter(self.db.conn.execute(self.query(), self.params))
+
+    @perf.timed("view.page")
+    def page(self, start, count):
+        return self.db.conn.execute(self.query(" LIMIT ? OFFSET ?"), (*self.params, count, start)).fetchall()
+
+    def detached(self):
+        # Export tuples read through a separate connection (a WAL reader sees
+        # the last commit), safe to consume on another thread
+        return query_rows(self.db.path, self.query(), self.params)
+
+def connect(path, **kwargs):
+    # SQLite's lower() only folds ASCII; py_lower is Python's str.lower, so
+    # "élise" finds "Élise" here just like in the text backend
+    conn = sqlite3.connect(path, **kwargs)
+    conn.create_function("py_lower", 1, str.lower, deterministic=True)
+    return conn
+
+def query_rows(path, sql, params):
+    conn = connect(path)
+    try:
+        cur = conn.execute(sql, params)
+        for rows in iter(lambda: cur.fetchmany(BATCH_ROWS), []):
+            yield from rows
+    finally:
+        conn.close()
+
+@perf.timed("import.insert")
+def bulk_insert(conn, batches, report):
+    # Streams (rows, bytes_read) batches into the table in one transaction;
+    # codes that are already present are kept and reported as duplicates.
+    # Per-row trigger and index upkeep dominate a bulk insert, so the
+    # histogram is rebuilt once at the end, and into an empty table the
+    # secondary indexes are built after the rows are in.
+    conn.execute("BEGIN")
+    try:
+        empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM students)").fetchone()[0]
+        conn.execute("DROP TRIGGER students_added")
+        if empty:
+            conn.execute("DROP INDEX students_name")
+            conn.execute("DROP INDEX students_percent")
+
+        for batch, _ in batches:
+            last_rowid = conn.execute("SELECT IFNULL(MAX(rowid), 0) FROM students").fetchone()[0]
+            before = conn.total_changes
+            conn.executemany(INSERT_OR_IGNORE_SQL, (db_row(*row) for row in batch))
+            if conn.total_changes - before < len(batch):
+                report.duplicates += skipped_codes(conn, batch, last_rowid)
+
+        for sql in INDEXES:
+            conn.execute(sql)
+        conn.execute("DELETE FROM total_counts")
+        conn.execute("INSERT INTO total_counts SELECT total, COUNT(*) FROM students GROUP BY total")
+        conn.execute(ADDED_TRIGGER)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    report.loaded -= len(report.duplicates)
+
+def skipped_codes(conn, batch, last_rowid):
+    # Batch rows that lost to a code stored before the batch, or to an
+    # earlier row of the same batch
+    codes = [row[0] for row in batch]
+    older = set()
+    for i in range(0, len(codes), 500):
+        chunk = codes[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        older.update(code for (code,) in conn.execute(
+            f"SELECT code FROM students WHERE rowid <= ? AND code IN ({marks})", (last_rowid, *chunk)))
+    seen = set()
+    skipped = []
+    for code in codes:
+        if code in older or code in seen:
+            skipped.append(code)
+        else:
+            seen.add(code)
+    return skipped
+
+class SqliteDatabase:
+    # See StudentDatabase for the shared backend methods. Edits run straight
+    # away inside one open transaction; save_job() commits it, so a burst of
+    # edits costs one commit. Rows come back as sqlite3.Row (row["name"] etc).
+    flush_before_read = True  # Imports and exports use their own connection
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = connect(path)
+        self.conn.row_factory = sqlite3.Row
+        # WAL with synchronous=NORMAL: commits append to the log without an fsync each
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(TABLES + ";\n".join(INDEXES) + ";\n" + TRIGGERS)
+        self.stats = HistogramStats(self.conn)
+
+    # Loading (nothing to read up front, queries go to the file)
+    def prepare_load(self, progress=None):
+        return None, LoadReport()
+
+    def finish_load(self, state):
+        self.stats.stale = True
+
+    def load(self, progress=None):
+        state, report = self.prepare_load(progress)
+        self.finish_load(state)
+        report.loaded = len(self.view())
+        return report
+
+    # Editing
+    def add(self, code, name, c1, c2, c3, exam):
+        check_record(code, name, c1, c2, c3, exam)
+        try:
+            self.conn.execute(INSERT_SQL, db_row(code, name, c1, c2, c3, exam))
+        except sqlite3.IntegrityError:
+            raise DuplicateCodeError(f"Student code {code} already exists.")
+        self.stats.stale = True
+
+    def update(self, code, name, c1, c2, c3, exam):
+        check_record(code, name, c1, c2, c3, exam)
+        cur = self.conn.execute(
+            "UPDATE students SET name = ?, cw1 = ?, cw2 = ?, cw3 = ?, exam = ?, total = ?, percent = ?, grade = ? "
+            "WHERE code = ?", (name, c1, c2, c3, exam, *derived(c1, c2, c3, exam), code))
+        if not cur.rowcount:
+            raise KeyError(code)
+        self.stats.stale = True
+
+    def delete(self, code):
+        cur = self.conn.execute("DELETE FROM students WHERE code = ?", (code,))
+        if not cur.rowcount:
+            raise KeyError(code)
+        self.stats.stale = True
+
+    def get(self, code):
+        return self.conn.execute(f"SELECT {ROW_COLUMNS} FROM students WHERE code = ?", (code,)).fetchone()
+
+    # Saving
+    def has_pending(self):
+        return self.conn.in_transaction
+
+    @perf.timed("save.commit")
+    def save_job(self):
+        # Committing here: the connection belongs to this thread, and a WAL
+        # commit is cheap enough not to need the I/O thread
+        self.conn.commit()
+        return None
+
+    def save_failed(self, job):
+        pass
+
+    def flush(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    # Queries
+    def view(self, sort_col="percent", desc=True, term=""):
+        direction = " DESC" if desc else ""
+        order = f"{ORDER_BY[sort_col]}{direction}, rowid{direction}"
+        if term:
+            # Same rule as the text backend: name contains, code starts with
+            return SqlView(self, "instr(py_lower(name), ?) OR (code >= ? AND code < ?)",
+                           (term, term, term + "\U0010ffff"), order)
+        return SqlView(self, "", (), order)
+
+    def find(self, query):
+        found = self.get(query.strip())
+        if not found:
+            found = self.conn.execute(f"SELECT {ROW_COLUMNS} FROM students WHERE instr(py_lower(name), ?) "
+                                      "ORDER BY rowid LIMIT 1", (query.lower(),)).fetchone()
+        return found
+
+    def extreme(self, highest):
+        # First student (in insertion order) with the best or worst percent;
+        # both steps are lookups in the percent index
+        best = self.conn.execute(f"SELECT {'MAX' if highest else 'MIN'}(percent) FROM students").fetchone()[0]
+        if best is None:
+            return None
+        return self.conn.execute(f"SELECT {ROW_COLUMNS} FROM students WHERE percent = ? ORDER BY rowid LIMIT 1",
+                                 (best,)).fetchone()
+
+    def highest(self):
+        return self.extreme(highest=True)
+
+    def lowest(self):
+        return self.extreme(highest=False)
+
+    def top(self, n, lowest=False):
+        return self.view("percent", desc=not lowest).page(0, n)
+
+    def summary(self):
+        return {
+            "count": len(self.view()),
+            "average": self.stats.average(),
+            "median": self.stats.median(),
+            "p25": self.stats.percentile(25),
+            "p75": self.stats.percentile(75),
+            "grades": self.stats.grade_counts(),
+        }
+
+    # Bulk access
+    def iter_columns(self):
+        # (codes, names, cw1, cw2, cw3, exam) blocks in insertion order
+        cur = self.conn.execute("SELECT code, name, cw1, cw2, cw3, exam FROM students ORDER BY rowid")
+        while True:
+            rows = cur.fetchmany(BATCH_ROWS)
+            if not rows:
+                return
+            codes, names, *marks = zip(*rows)
+            yield [list(codes), list(names)] + [array("h", col) for col in marks]
+
+    @perf.timed("import")
+    def prepare_import(self, batches, report):
+        # Bulk insert on a connection of its own, so it can run on a worker
+        # thread; the GUI commits its own edits first
+        conn = connect(self.path, timeout=30)
+        try:
+            bulk_insert(conn, batches, report)
+        finally:
+            conn.close()
+
+    def finish_import(self, state, report):
+        self.stats.stale = True
+
+    def import_batches(self, batches, report):
+        self.conn.commit()
+        bulk_insert(self.conn, batches, report)
+        self.stats.stale = True
+        return report
+
+    def import_marks(self, path):
+        report = LoadReport()
+        return self.import_batches(iter_student_batches(path, report=report), report)
+
+    def export_marks(self, path):
+        # Atomic streaming write of the count + CSV text format
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(f"{len(self.view())}\n")
+            cur = self.conn.execute("SELECT code, name, cw1, cw2, cw3, exam FROM students ORDER BY rowid")
+            for rows in iter(lambda: cur.fetchmany(BATCH_ROWS), []):
+                f.writelines(format_row(*row) for row in rows)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
@@ -0,0 +1,264 @@
+# Tests for the Student Manager engine: the incremental indexes against a
+# from-scratch rebuild, undo/redo, shard merging, the snapshot and the journal.
+# Run from this folder: python -m pytest -q   (or python -m unittest)
+import os
+import random
+import tempfile
+import unittest
+
+from student_core import (Aggregates, DuplicateCodeError, EditHistory, InvalidRecordError, LoadReport,
+                          MarksFile, SortCache, StudentDatabase, StudentStore, format_row, import_shards,
+                          load_store, percent_of)
+
+NAMES = ["Ada Lovelace", "Alan Turing", "Grace Hopper", "Élise Moreau", "Al Ng", "Lee Curry"]
+SORT_COLUMNS = ("code", "name", "cw1", "exam", "coursework", "total", "percent", "grade")
+TERMS = ["a", "al", "ala", "alan", "e", "élise", "cu", "1", "10", "12", "x"]
+
+def random_row(rng, code):
+    # Mostly repeated names, some new ones so distinct names come and go
+    name = rng.choice(NAMES) if rng.random() < 0.8 else f"Alana Cu {rng.randrange(50)}"
+    return (code, name, rng.randint(0, 20), rng.randint(0, 20), rng.randint(0, 20), rng.randint(0, 100))
+
+def random_edits(db, rng, steps):
+    # Adds, updates and deletes in random order, so deleted slots get recycled
+    for _ in range(steps):
+        codes = list(db.records.index)
+        roll = rng.random()
+        if roll < 0.4 or len(codes) < 5:
+            code = str(rng.randrange(100, 2000))
+            if code not in db.records:
+                db.add(*random_row(rng, code))
+        elif roll < 0.7:
+            db.update(*random_row(rng, rng.choice(codes)))
+        else:
+            db.delete(rng.choice(codes))
+
+class IncrementalIndexTest(unittest.TestCase):
+    # Every structure patched on edits must match one rebuilt from scratch
+    def setUp(self):
+        self.rng = random.Random(7)
+        self.db = StudentDatabase(os.devnull)
+        store = StudentStore()
+        store.extend(random_row(self.rng, str(1000 + i)) for i in range(300))
+        self.db.finish_load(store)
+        # Building every index first, so the edits below patch them
+        for col in SORT_COLUMNS:
+            self.db.sorter.order(col)
+        self.db.finder.search("a")
+        self.db.stats.refresh()
+
+    def check_sort(self):
+        store = self.db.records
+        fresh = SortCache(store)
+        store.listeners.remove(fresh)
+        for col in SORT_COLUMNS:
+            self.assertEqual(self.db.sorter.order(col), fresh.order(col), col)
+
+    def check_search(self, term):
+        store = self.db.records
+        expected = {slot for slot in store.slots()
+                    if term in store.names[slot].lower() or store.codes[slot].startswith(term)}
+        self.assertEqual(self.db.finder.search(term), expected, term)
+
+    def check_stats(self):
+        store = self.db.records
+        fresh = Aggregates(store, self.db.sorter)
+        store.listeners.remove(fresh)
+        fresh.refresh()
+        stats = self.db.stats
+        self.assertEqual(stats.count, len(store))
+        self.assertEqual(stats.pct_sum, fresh.pct_sum)
+        self.assertEqual(stats.grade_counts(), fresh.grade_counts())
+        self.assertEqual(stats.median(), fresh.median())
+        for p in (1, 25, 50, 75, 99, 100):
+            self.assertEqual(stats.percentile(p), fresh.percentile(p), p)
+
+        # And the median / percentiles against the plain definitions
+        pcts = sorted(percent_of(store.totals[slot]) for slot in store.slots())
+        n = len(pcts)
+        self.assertAlmostEqual(stats.median(), (pcts[(n - 1) // 2] + pcts[n // 2]) / 2)
+        self.assertEqual(stats.percentile(25), pcts[max(1, -(-n * 25 // 100)) - 1])
+        best = max(store.totals[slot] for slot in store.slots())
+        first = min(slot for slot in store.slots() if store.totals[slot] == best)
+        self.assertEqual(stats.extreme_slot(highest=True), first)
+
+    def test_random_edits_match_rebuild(self):
+        for _ in range(30):
+            random_edits(self.db, self.rng, 20)
+            self.check_sort()
+            self.check_stats()
+            # Typing, then backspacing, exercises the narrowing path
+            for term in TERMS + TERMS[::-1]:
+                self.check_search(term)
+
+    def test_search_after_reset(self):
+        self.db.records.extend([random_row(self.rng, "7777")])
+        self.check_search("77")
+        self.check_search("7777")
+        self.check_sort()
+
+class EditHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.db = StudentDatabase(os.devnull)
+        self.db.finish_load(StudentStore())
+        self.history = EditHistory(self.db)
+        self.history.add("1", "Ada Lovelace", 1, 2, 3, 4)
+        self.history.add("2", "Alan Turing", 5, 6, 7, 8)
+
+    def rows(self):
+        return {code: tuple(self.db.get(code)[k] for k in ("name", "cw1", "cw2", "cw3", "exam"))
+                for code in self.db.records.index}
+
+    def test_failed_batch_is_reverted(self):
+        before = self.rows()
+        with self.assertRaises(InvalidRecordError):
+            with self.history.batch():
+                self.history.update("1", "Ada Lovelace", 20, 20, 20, 100)
+                self.history.delete("2")
+                self.history.add("3", "Grace Hopper", 99, 0, 0, 0)
+        self.assertEqual(self.rows(), before)
+        self.assertEqual(len(self.history.undo_steps), 2)
+
+    def test_batch_is_one_step(self):
+        before = self.rows()
+        with self.history.batch():
+            self.history.update("1", "Ada", 0, 0, 0, 0)
+            self.history.update("1", "Ada King", 1, 1, 1, 1)
+            self.history.delete("2")
+        after = self.rows()
+        self.assertEqual(sorted(self.history.undo()), ["1", "2"])
+        self.assertEqual(self.rows(), before)
+        self.history.redo()
+        self.assertEqual(self.rows(), after)
+
+    def test_failed_undo_changes_nothing(self):
+        with self.history.batch():
+            self.history.delete("1")
+            self.history.delete("2")
+        self.db.add("2", "Imported", 1, 1, 1, 1)  # Changed behind the history
+        before = self.rows()
+        with self.assertRaises(DuplicateCodeError):
+            self.history.undo()
+        self.assertEqual(self.rows(), before)
+        self.assertEqual(len(self.history.undo_steps), 3)
+        self.assertEqual(self.history.redo_steps, [])
+
+class ShardMergeTest(unittest.TestCase):
+    def test_collisions_name_the_owning_shard(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            shards = {"a.txt": ["1", "2"], "b.txt": ["3", "4", "4"], "c.txt": ["5", "3", "1"]}
+            paths = []
+            for name, codes in shards.items():
+                path = os.path.join(tmp, name)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(f"{len(codes)}\n")
+                    f.writelines(format_row(code, f"Student {code}", 1, 2, 3, 4) for code in codes)
+                paths.append(path)
+
+            store = StudentStore()
+            report = import_shards(paths, store, workers=1)
+            self.assertEqual(sorted(store.index), ["1", "2", "3", "4", "5"])
+            self.assertEqual(sorted((code, os.path.basename(kept), os.path.basename(skipped))
+                                    for code, kept, skipped in report.collisions),
+                             [("1", "a.txt", "c.txt"), ("3", "b.txt", "c.txt")])
+            self.assertEqual(dict((os.path.basename(p), r.duplicates) for p, r in report.shards)["b.txt"], ["4"])
+            self.assertEqual([r.loaded for _, r in report.shards], [2, 2, 1])
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "studentMarks.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("2\n" + format_row("1", "Ada Lovelace", 1, 2, 3, 4) + format_row("2", "Élise", 5, 6, 7, 8))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def load(self):
+        store = StudentStore()
+        report = load_store(MarksFile(self.path), store)
+        return store, report
+
+    def test_snapshot_matches_text(self):
+        text, _ = self.load()       # Parses the text and writes the snapshot
+        self.assertTrue(os.path.exists(self.path + ".snap"))
+        snap = StudentStore()
+        self.assertTrue(MarksFile(self.path).load_snapshot(snap))
+        self.assertEqual(list(snap.iter_tuples()), list(text.iter_tuples()))
+
+    def test_edited_text_invalidates_snapshot(self):
+        self.load()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(format_row("3", "Grace Hopper", 9, 9, 9, 9))
+        self.assertFalse(MarksFile(self.path).load_snapshot(StudentStore()))
+        store, _ = self.load()
+        self.assertIn("3", store)
+
+    def test_same_size_edit_invalidates_snapshot(self):
+        self.load()
+        with open(self.path, encoding="utf-8") as f:
+            text = f.read()
+        st = os.stat(self.path)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text.replace("1,2,3,4", "4,3,2,1"))
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        store, _ = self.load()
+        self.assertEqual(store.find("1")["cw1"], 4)
+
+    def test_bad_file_gets_no_snapshot(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("3,Bad Row,99,0,0,0\n")
+        _, report = self.load()
+        self.assertFalse(report.clean())
+        self.assertFalse(os.path.exists(self.path + ".snap"))
+
+class TornJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "studentMarks.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("1\n" + format_row("1001", "Ada Lovelace", 10, 12, 14, 60))
+        self.storage = MarksFile(self.path, use_snapshot=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def replay(self):
+        store = StudentStore()
+        store.append("1001", "Ada Lovelace", 10, 12, 14, 60)
+        report = LoadReport()
+        self.storage.replay_journal(store, report)
+        return store, report
+
+    def test_append_after_torn_tail(self):
+        # A crash left half an entry without its newline
+        with open(self.storage.journal_path, "w", encoding="utf-8") as f:
+            f.write("~," + format_row("1001", "Ada Lovelace", 11, 12, 14, 60) + "+,1002,Alan Tur")
+        self.storage.append_entries(["+," + format_row("1003", "Grace Hopper", 20, 20, 20, 90)])
+
+        store, report = self.replay()
+        self.assertTrue(report.clean())
+        self.assertEqual(store.find("1001")["cw1"], 11)
+        self.assertIsNone(store.find("1002"))
+        self.assertEqual(store.find("1003")["name"], "Grace Hopper")
+
+    def test_torn_first_entry(self):
+        with open(self.storage.journal_path, "wb") as f:
+            f.write(b"-,10")
+        self.storage.append_entries(["-,1001\n"])
+
+        store, report = self.replay()
+        self.assertTrue(report.clean())
+        self.assertEqual(len(store), 0)
+
+    def test_malformed_entries_are_reported(self):
+        with open(self.storage.journal_path, "w", encoding="utf-8") as f:
+            f.write("-\n+,1002,Alan Turing,x,1,1,1\n?,1001\n+," + format_row("1003", "Grace Hopper", 1, 2, 3, 4))
+
+        store, report = self.replay()
+        self.assertEqual([n for n, _, _ in report.problems], [1, 2, 3])
+        self.assertEqual(store.find("1003")["exam"], 4)
+        self.assertEqual(store.find("1001")["exam"], 60)
+
+if __name__ == "__main__":
+    unittest.main()
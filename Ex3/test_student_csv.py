@@ -0,0 +1,82 @@
+# Tests for the CSV / TSV column mapping and the streaming importer.
+# Run from this folder: python -m pytest -q   (or python -m unittest)
+import os
+import tempfile
+import unittest
+
+from student_core import InvalidRecordError, LoadReport
+from student_csv import iter_csv_batches, map_columns, parse_mapping
+
+class MappingTest(unittest.TestCase):
+    def test_parse_mapping(self):
+        self.assertEqual(parse_mapping(" code=ID, name = Student ,exam=3"),
+                         {"code": "ID", "name": "Student", "exam": 3})
+        self.assertEqual(parse_mapping(""), {})
+        for bad in ("code", "grade=G", "name="):
+            with self.assertRaises(InvalidRecordError):
+                parse_mapping(bad)
+
+    def test_aliases_are_case_insensitive(self):
+        header = ["Final", "Student Name", "CW 1", "cw2", "Coursework 3", "Student ID"]
+        self.assertEqual(map_columns(header), [5, 1, 2, 3, 4, 0])
+
+    def test_explicit_mapping_wins(self):
+        header = ["id", "other id", "name", "cw1", "cw2", "cw3", "exam"]
+        self.assertEqual(map_columns(header, {"code": "Other ID"})[0], 1)
+        self.assertEqual(map_columns(header, {"code": 1, "exam": 6})[::5], [1, 6])
+
+    def test_missing_column(self):
+        with self.assertRaises(InvalidRecordError):
+            map_columns(["code", "name", "cw1", "cw2", "cw3"])
+        with self.assertRaises(InvalidRecordError):
+            map_columns(["code", "name", "cw1", "cw2", "cw3", "exam"], {"exam": 9})
+
+class ImportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return path
+
+    def rows(self, path, mapping=None):
+        report = LoadReport()
+        rows = [row for batch, _ in iter_csv_batches(path, mapping, report) for row in batch]
+        return rows, report
+
+    def test_mapped_rows_and_bad_lines(self):
+        path = self.write("roster.csv", "\ufeffStudent,Final,ID,CW 1,CW 2,CW 3\n"
+                                        '"Lovelace, Ada",70,1001,10,11,12\n'
+                                        "\n"
+                                        "Alan Turing,101,1002,1,1,1\n"
+                                        "Grace Hopper,x,1003,1,1,1\n"
+                                        "Short,1\n"
+                                        "Élise Moreau,55,1004,20,0,5\n")
+        rows, report = self.rows(path)
+        self.assertEqual(rows, [("1001", "Lovelace, Ada", 10, 11, 12, 70),
+                                ("1004", "Élise Moreau", 20, 0, 5, 55)])
+        self.assertEqual([n for n, _, _ in report.problems], [4, 5, 6])
+        self.assertEqual(report.data_lines, 5)
+        self.assertEqual(report.loaded, 2)
+
+    def test_tsv_with_positions(self):
+        path = self.write("marks.tsv", "a\tb\tc\td\te\tf\n7\tNg\t1\t2\t3\t4\n")
+        rows, report = self.rows(path, parse_mapping("code=0, name=1, cw1=2, cw2=3, cw3=4, exam=5"))
+        self.assertEqual(rows, [("7", "Ng", 1, 2, 3, 4)])
+        self.assertTrue(report.clean())
+
+    def test_undecodable_line_is_reported(self):
+        path = os.path.join(self.tmp.name, "latin.csv")
+        with open(path, "wb") as f:
+            f.write(b"code,name,cw1,cw2,cw3,exam\n1,Ren\xe9e,1,1,1,1\n2,Al,2,2,2,2\n")
+        rows, report = self.rows(path)
+        self.assertEqual(rows, [("2", "Al", 2, 2, 2, 2)])
+        self.assertEqual([n for n, _, _ in report.problems], [2])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+# Seeded generators for benchmark inputs: studentMarks.txt-style cohorts and
+# randomJokes.txt-style joke files. The same (rows, seed) always gives the
+# same bytes, so runs on different commits measure identical data.
+# run.py and the bench_*.py scripts in Ex2 / Ex3 all take their data from here.
+# Usage: python cohort.py marks OUT ROWS [--seed N]
+#        python cohort.py jokes OUT COUNT [--seed N]
+import argparse
+import os
+import random
+
+FIRST = ["John", "Sam", "Lee", "Matt", "Ron", "Jake", "Jo", "Gareth", "Alan", "Les",
+         "Aisha", "Priya", "Chen", "Fatima", "Olu", "Maria", "Tom", "Nina", "Omar", "Zoe"]
+LAST = ["Curry", "Scott", "Thompson", "Herrema", "Hobbs", "Hyde", "Shearer", "Ferdinand",
+        "Southgate", "Sturtivant", "Khan", "Patel", "Wang", "Okafor", "Garcia", "Novak"]
+
+SETUPS = ["Why did the {0} cross the road", "What do you call a {0} with no {1}",
+          "How does a {0} fix a {1}", "Why was the {0} afraid of the {1}",
+          "What did the {0} say to the {1}"]
+PUNCHLINES = ["To get to the other {1}.", "A {1}-less {0}!", "With a {1} of course.",
+              "Because the {1} was too {2}.", "Nothing, it just {2}."]
+WORDS = ["chicken", "clown", "janitor", "pizza", "robot", "teacher", "tomato", "penguin",
+         "road", "side", "fork", "closet", "cool", "loud", "waved", "smiled", "tire", "laptop"]
+
+# Lines are written in blocks to keep memory flat for 10^7 rows
+BLOCK = 100_000
+
+def student_rows(n, seed=1, start=0):
+    # (code, name, cw1, cw2, cw3, exam) for students start .. start + n - 1.
+    # Codes are unique 7+ digit strings (a seeded odd step through the range
+    # visits every code once), so calls with the same seed and disjoint
+    # start ranges never share a code. Coursework 0-20 x3, exam 0-100.
+    rng = random.Random(seed)
+    step = rng.randrange(1, 1_000_003) * 2 + 1
+    for i in range(start, start + n):
+        code = 1_000_000 + (i * step) % (1 << 24)
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        yield (str(code), name, rng.randint(0, 20), rng.randint(0, 20),
+               rng.randint(0, 20), rng.randint(0, 100))
+
+def write_marks(path, rows, seed=1):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{rows}\n")
+        block = []
+        for row in student_rows(rows, seed):
+            block.append("%s,%s,%d,%d,%d,%d\n" % row)
+            if len(block) >= BLOCK:
+                f.writelines(block)
+                block = []
+        f.writelines(block)
+    return path
+
+def joke_line(k, seed=1):
+    # "setup?punchline" like randomJokes.txt; the same (k, seed) always gives
+    # the same line, so an earlier k makes an exact duplicate
+    rng = random.Random((seed << 40) + k)
+    words = rng.sample(WORDS, 3)
+    setup = rng.choice(SETUPS).format(*words)
+    return f"{setup} #{k}?{rng.choice(PUNCHLINES).format(*words)}\n"
+
+def write_jokes(path, count, seed=1):
+    with open(path, "w", encoding="utf-8") as f:
+        for start in range(0, count, BLOCK):
+            f.writelines(joke_line(k, seed) for k in range(start, min(count, start + BLOCK)))
+    return path
+
+def write_joke_files(folder, files, lines, dupes=0.0, seed=1):
+    # `files` joke files of `lines` lines each, where about `dupes` of all
+    # lines repeat an earlier joke (maybe from another file); returns how
+    # many distinct jokes were written
+    rng = random.Random(seed)
+    made = 0
+    for n in range(files):
+        out = []
+        for _ in range(lines):
+            if made and rng.random() < dupes:
+                out.append(joke_line(rng.randrange(made), seed))
+            else:
+                out.append(joke_line(made, seed))
+                made += 1
+        with open(os.path.join(folder, f"jokes_{n:03d}.txt"), "w", encoding="utf-8") as f:
+            f.writelines(out)
+    return made
+
+def cached(folder, kind, n, seed=1):
+    # Generates a file once per (kind, n, seed) inside `folder` and reuses it
+    path = os.path.join(folder, f"{kind}_{n}_s{seed}.txt")
+    if not os.path.exists(path):
+        tmp = path + ".part"
+        (write_marks if kind == "marks" else write_jokes)(tmp, n, seed)
+        os.replace(tmp, path)
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a seeded benchmark input file.")
+    parser.add_argument("kind", choices=("marks", "jokes"))
+    parser.add_argument("out")
+    parser.add_argument("n", type=int)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    (write_marks if args.kind == "marks" else write_jokes)(args.out, args.n, args.seed)
@@ -0,0 +1,48 @@
+# Compares two run.py result files and flags scenarios that got slower.
+# Exits 1 if any scenario regressed by more than --threshold (default 20%),
+# so it can gate a CI job.
+# Usage: python compare.py old.json new.json [--threshold 0.2] [--min-ms 0.05]
+import argparse
+import json
+import sys
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    return doc, {(r["scenario"], r["rows"]): r["best_s"] for r in doc["results"]}
+
+def compare(old, new, threshold, min_s):
+    # (scenario, rows, old_s, new_s, ratio, flag) for every pair in both runs
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        ratio = after / before if before else float("inf")
+        # Timings below min_s are mostly noise, so they never count as regressions
+        slow = ratio > 1 + threshold and after >= min_s
+        fast = ratio < 1 / (1 + threshold) and before >= min_s
+        rows.append((*key, before, after, ratio, "SLOWER" if slow else "faster" if fast else ""))
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="ignore timings below this")
+    args = parser.parse_args()
+
+    old_doc, old = load(args.old)
+    new_doc, new = load(args.new)
+    print(f"{old_doc.get('commit') or args.old} -> {new_doc.get('commit') or args.new}")
+    print(f"{'scenario':<18} {'rows':>10} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    rows = compare(old, new, args.threshold, args.min_ms / 1e3)
+    for scenario, n, before, after, ratio, flag in rows:
+        print(f"{scenario:<18} {n:>10} {before * 1e3:>10.3f} {after * 1e3:>10.3f} {ratio:>6.2f}x {flag}")
+    missing = sorted(old.keys() - new.keys())
+    if missing:
+        print(f"Not in the new run: {', '.join(f'{s}@{n}' for s, n in missing)}")
+
+    regressions = sum(1 for row in rows if row[-1] == "SLOWER")
+    if regressions:
+        print(f"{regressions} scenario(s) slower by more than {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
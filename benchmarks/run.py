@@ -0,0 +1,240 @@
+# Headless benchmark suite for the Ex3 record engine and the Ex2 joke loader.
+# Every scenario runs on seeded synthetic files (see cohort.py) and reports the
+# best of --repeat runs; results go to JSON for compare.py.
+# Usage: python run.py [--sizes 1000,10000,100000] [--jokes 1000,100000]
+#                      [--repeat 3] [--seed 1] [--only load,search] [--data-dir DIR] [--out results.json]
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [os.path.join(ROOT, "Ex3"), os.path.join(ROOT, "Ex2")]
+
+from student_core import Aggregates, SearchIndex, SortCache, StudentDatabase
+from joke_corpus import JokeCorpus, index_path
+from cohort import cached
+
+SEARCH_KEYS = "curry"   # typed one key at a time, like the search box
+
+# Scenarios: name -> function(path, workdir) returning a zero-argument callable
+# to time. Setup happens outside the timed call, so every run starts fresh.
+
+def loaded(path, use_snapshot=False):
+    db = StudentDatabase(path, use_snapshot)
+    db.load()
+    return db
+
+def some_code(db):
+    return db.records.codes[len(db.records.codes) // 2]
+
+def scenario_load_parse(path, work):
+    return lambda: StudentDatabase(path, use_snapshot=False).load()
+
+def scenario_load_snapshot(path, work):
+    # The first load writes the snapshot (into the copy's folder), the timed one reads it
+    copy = os.path.join(work, "snap_" + os.path.basename(path))
+    if not os.path.exists(copy):
+        with open(path, "rb") as src, open(copy, "wb") as dst:
+            dst.write(src.read())
+    StudentDatabase(copy).load()
+    return lambda: StudentDatabase(copy).load()
+
+def scenario_save_rewrite(path, work):
+    db = loaded(path)
+    out = os.path.join(work, "rewrite.txt")
+    db.storage = type(db.storage)(out, use_snapshot=False)
+    return lambda: db.storage.write_all(db.records)
+
+def scenario_save_edit(path, work):
+    # One update made durable: a journal append, or a rewrite for small files
+    copy = os.path.join(work, "edit.txt")
+    db = loaded(path)
+    db.storage = type(db.storage)(copy, use_snapshot=False)
+    db.storage.write_all(db.records)
+    code = some_code(db)
+    return lambda: (db.update(code, "Bench Mark", 1, 2, 3, 4), db.flush())
+
+def scenario_sort(col):
+    def scenario(path, work):
+        db = loaded(path)
+        return lambda: SortCache(db.records).order(col)
+    return scenario
+
+def scenario_search_keys(path, work):
+    # Index build on the first key, then narrowing on each further key
+    db = loaded(path)
+    def run():
+        finder = SearchIndex(db.records, db.sorter)
+        for i in range(1, len(SEARCH_KEYS) + 1):
+            finder.search(SEARCH_KEYS[:i])
+        db.records.listeners.remove(finder)
+    return run
+
+def scenario_search_view(path, work):
+    # What the table does per keystroke once the indexes exist
+    db = loaded(path)
+    db.view("percent", True, SEARCH_KEYS)
+    def run():
+        for i in range(1, len(SEARCH_KEYS) + 1):
+            db.view("percent", True, SEARCH_KEYS[:i])
+    return run
+
+def scenario_edit_update(path, work):
+    # In-memory update with the percent and name sort orders and stats live
+    db = loaded(path)
+    db.view("percent"), db.view("name"), db.summary()
+    code = some_code(db)
+    marks = iter(range(10 ** 9))
+    return lambda: db.update(code, "Bench Mark", 1, 2, 3, next(marks) % 100)
+
+def scenario_edit_delete(path, work):
+    db = loaded(path)
+    db.view("percent"), db.view("name"), db.summary()
+    row = db.get(some_code(db))
+    state = (row["code"], row["name"], row["cw1"], row["cw2"], row["cw3"], row["exam"])
+    def run():
+        db.delete(state[0])
+        db.add(*state)  # put back so the next run deletes the same row
+    return run
+
+def scenario_stats_rebuild(path, work):
+    db = loaded(path)
+    def run():
+        stats = Aggregates(db.records, db.sorter)
+        stats.refresh()
+        db.records.listeners.remove(stats)
+    return run
+
+def scenario_stats_summary(path, work):
+    # Summary after one edit, served from the running aggregates
+    db = loaded(path)
+    db.summary()
+    code = some_code(db)
+    return lambda: (db.update(code, "Bench Mark", 5, 5, 5, 50), db.summary())
+
+MARKS_SCENARIOS = {
+    "load.parse": scenario_load_parse,
+    "load.snapshot": scenario_load_snapshot,
+    "save.rewrite": scenario_save_rewrite,
+    "save.edit": scenario_save_edit,
+    "sort.percent": scenario_sort("percent"),
+    "sort.name": scenario_sort("name"),
+    "sort.code": scenario_sort("code"),
+    "search.keystrokes": scenario_search_keys,
+    "search.view": scenario_search_view,
+    "edit.update": scenario_edit_update,
+    "edit.delete": scenario_edit_delete,
+    "stats.rebuild": scenario_stats_rebuild,
+    "stats.summary": scenario_stats_summary,
+}
+
+def scenario_jokes_load(path, work):
+    # Ex2 reads randomJokes.txt from the working directory first
+    import Ex2
+    folder = os.path.join(work, "jokes_" + os.path.basename(path))
+    os.makedirs(folder, exist_ok=True)
+    target = os.path.join(folder, "randomJokes.txt")
+    if not os.path.exists(target):
+        shutil.copyfile(path, target)
+    def run():
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            Ex2.load_jokes()
+        finally:
+            os.chdir(cwd)
+    return run
+
+def scenario_jokes_index(path, work):
+    # Cold start: no cached offset index next to the file yet
+    copy = os.path.join(work, "index_" + os.path.basename(path))
+    if not os.path.exists(copy):
+        shutil.copyfile(path, copy)
+    if os.path.exists(index_path(copy)):
+        os.remove(index_path(copy))
+    return lambda: JokeCorpus(copy)
+
+def scenario_jokes_pick(path, work):
+    # 1000 random jokes through the index, as the Next Joke button does
+    corpus = JokeCorpus(path)
+    rng = random.Random(1)
+    return lambda: [rng.choice(corpus) for _ in range(1000)]
+
+JOKE_SCENARIOS = {
+    "jokes.load": scenario_jokes_load,
+    "jokes.index": scenario_jokes_index,
+    "jokes.pick": scenario_jokes_pick,
+}
+
+def best_of(make, path, work, repeat):
+    runs = []
+    for _ in range(repeat):
+        fn = make(path, work)
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes, joke_sizes, repeat, only, data_dir, seed=1):
+    results = []
+    plan = [(MARKS_SCENARIOS, "marks", sizes), (JOKE_SCENARIOS, "jokes", joke_sizes)]
+    with tempfile.TemporaryDirectory(prefix="bench_work_") as work:
+        for scenarios, kind, ns in plan:
+            for n in ns:
+                path = cached(data_dir, kind, n, seed)
+                for name, make in scenarios.items():
+                    if only and not any(name.startswith(o) for o in only):
+                        continue
+                    runs = best_of(make, path, work, repeat)
+                    results.append({"scenario": name, "rows": n, "best_s": min(runs), "runs_s": runs})
+                    print(f"{name:<18} {n:>10} {min(runs) * 1e3:>11.3f} ms", file=sys.stderr)
+    return results
+
+def parse_sizes(text):
+    return [int(float(s)) for s in text.split(",") if s]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Ex2/Ex3 benchmark suite.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="cohort sizes, e.g. 1e3,1e5,1e7")
+    parser.add_argument("--jokes", default="1000,100000", help="joke file sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1, help="generator seed for the inputs")
+    parser.add_argument("--only", default="", help="comma-separated scenario prefixes")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "student_bench_data"),
+                        help="where generated inputs are cached between runs")
+    parser.add_argument("--out", default="-", help="JSON results file (default: stdout)")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = run_suite(parse_sizes(args.sizes), parse_sizes(args.jokes), args.repeat,
+                        [o for o in args.only.split(",") if o], args.data_dir, args.seed)
+    doc = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(doc, indent=2)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")